@@ -0,0 +1,319 @@
+"""Headless HTTP API for account research.
+
+Runs the same search -> scrape -> summary -> Word export pipeline as the Streamlit
+app for programmatic clients such as the CRM, without the app's websocket and
+rerun overhead. Reports are shared with the app and the prefetch job through the
+report cache.
+
+The API is a separate process with its own Azure OpenAI quota scheduler: queue
+priority does not reach the app, so give it a slice of each deployment's quota
+(--quota-share, or AZURE_OPENAI_QUOTA_SHARE) and lower the app's share to match.
+
+    python api.py --port 8600 --quota-share 0.25
+    python api.py --fake-llm --fake-web    # offline, against the load-test stubs
+
+Endpoints:
+
+    POST /research                {"company": "Acme", "refresh": false}
+        200 with the report location if a fresh report is cached; otherwise 202
+        with a job to poll (also in the Location header). Requests for a company
+        that is already being researched join the running job.
+    GET  /jobs/<id>               job status: queued, running, done or failed
+    GET  /reports/<company>       stored report, scraped fields and timestamps as JSON
+    GET  /reports/<company>.docx  stored report as a Word document
+
+Report responses carry an ETag and answer If-None-Match with 304 Not Modified.
+Set RESEARCH_API_KEY to require "Authorization: Bearer <key>" on every request.
+"""
+import argparse
+import functools
+import hashlib
+import hmac
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote, urlparse
+
+import report_cache
+from fill_template import fill_word_template
+
+API_KEY = os.getenv("RESEARCH_API_KEY")
+MAX_JOBS = int(os.getenv("RESEARCH_API_MAX_JOBS", "4"))
+JOB_TTL = float(os.getenv("RESEARCH_API_JOB_TTL", "3600"))
+MAX_BODY_BYTES = 64 * 1024
+TEMPLATE_PATH = "ModelTemplate.docx"
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def report_url(company_name, suffix=""):
+    return f"/reports/{quote(company_name, safe='')}{suffix}"
+
+
+def report_etag(entry, representation, fresh=None):
+    """Strong ETag over everything in the representation; `fresh` is part of the JSON body, so it is hashed too."""
+    key = f"{entry['generated_at']}:{entry.get('prompt_version')}:{fresh}:{entry['report']}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+    return f'"{digest}-{representation}"'
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+@functools.lru_cache(maxsize=64)
+def report_docx(report_text):
+    return fill_word_template(TEMPLATE_PATH, report_text).getvalue()
+
+
+# -------------------------
+# Research jobs
+
+class Job:
+    def __init__(self, company_name):
+        self.id = uuid.uuid4().hex
+        self.company_name = company_name
+        self.status = "queued"
+        self.error = None
+        self.requests = 1
+        self.submitted_at = time.time()
+        self.finished_at = None
+
+    def as_dict(self):
+        return {
+            "job_id": self.id,
+            "company": self.company_name,
+            "status": self.status,
+            "error": self.error,
+            "requests": self.requests,
+            "submitted_at": self.submitted_at,
+            "finished_at": self.finished_at,
+            **({"report": report_url(self.company_name), "docx": report_url(self.company_name, ".docx")}
+               if self.status == "done" else {}),
+        }
+
+
+class JobRunner:
+    """Runs research jobs on a bounded pool, coalescing requests for a company already in flight."""
+
+    def __init__(self, max_jobs=MAX_JOBS, job_ttl=JOB_TTL):
+        self.executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="research-job")
+        self.job_ttl = job_ttl
+        self.jobs = {}
+        self.in_flight = {}  # normalized company name -> Job
+        self._lock = threading.Lock()
+
+    def submit(self, company_name):
+        """Returns (job, joined): the new job, or the running one for the same company."""
+        key = report_cache.normalize(company_name)
+        with self._lock:
+            self._prune()
+            job = self.in_flight.get(key)
+            if job is not None:
+                job.requests += 1
+                return job, True
+            job = Job(company_name)
+            self.jobs[job.id] = job
+            self.in_flight[key] = job
+        self.executor.submit(self._run, job, key)
+        return job, False
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def _run(self, job, key):
+        # Imported here so a stub environment set up in main() is in place before configuration is read
+        from prefetch import prefetch_account
+
+        job.status = "running"
+        started = time.perf_counter()
+        try:
+            status, detail = prefetch_account(job.company_name)
+        except Exception as e:
+            status, detail = "failed", str(e)
+        with self._lock:
+            job.status = "done" if status == "generated" else "failed"
+            job.error = detail
+            job.finished_at = time.time()
+            self.in_flight.pop(key, None)
+        print(f"Research job {job.id} [{job.status}] {job.company_name} ({time.perf_counter() - started:.1f}s, "
+              f"{job.requests} request(s)){': ' + detail if detail else ''}")
+
+    def _prune(self):
+        cutoff = time.time() - self.job_ttl
+        for job_id in [i for i, job in self.jobs.items() if job.finished_at and job.finished_at < cutoff]:
+            del self.jobs[job_id]
+
+
+# -------------------------
+# HTTP
+
+class ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, runner):
+        super().__init__(address, ApiHandler)
+        self.runner = runner
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "SalesResearchAPI/1.0"
+    # Headers and body are separate writes; without TCP_NODELAY small keep-alive responses stall ~40ms
+    disable_nagle_algorithm = True
+
+    def send_body(self, body, content_type, status=200, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def send_json(self, payload, status=200, headers=None):
+        self.send_body(json.dumps(payload).encode("utf-8"), "application/json", status, headers)
+
+    def send_error_json(self, status, message):
+        self.send_json({"error": message}, status)
+
+    def authorized(self):
+        if not API_KEY:
+            return True
+        supplied = self.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if hmac.compare_digest(supplied.encode("utf-8"), API_KEY.encode("utf-8")):
+            return True
+        self.close_connection = True  # any request body is left unread
+        self.send_json({"error": "missing or invalid API key"}, 401, {"WWW-Authenticate": "Bearer"})
+        return False
+
+    def do_POST(self):
+        if not self.authorized():
+            return
+        if urlparse(self.path).path != "/research":
+            return self.send_error_json(404, "not found")
+        length = (self.headers.get("Content-Length") or "").strip()
+        if not (length.isascii() and length.isdigit()):
+            # Without a usable length the body cannot be read or skipped, so drop the connection
+            self.close_connection = True
+            return self.send_error_json(400, "a valid Content-Length header is required")
+        length = int(length)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            return self.send_error_json(413, "request body too large")
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            company_name = " ".join(str(payload["company"]).split())
+        except (ValueError, KeyError, TypeError):
+            return self.send_error_json(400, 'expected a JSON body like {"company": "Acme"}')
+        if not company_name:
+            return self.send_error_json(400, "company must not be empty")
+
+        from research import PROMPT_VERSION
+        if not payload.get("refresh") and report_cache.load_fresh(company_name, PROMPT_VERSION):
+            return self.send_json({"company": company_name, "status": "done", "report": report_url(company_name),
+                                   "docx": report_url(company_name, ".docx")})
+        job, joined = self.server.runner.submit(company_name)
+        self.send_json({**job.as_dict(), "joined_existing": joined}, 202, {"Location": f"/jobs/{job.id}"})
+
+    def do_GET(self):
+        if not self.authorized():
+            return
+        path = urlparse(self.path).path
+        if path.startswith("/jobs/"):
+            job = self.server.runner.get(path.removeprefix("/jobs/"))
+            if job is None:
+                return self.send_error_json(404, "unknown or expired job")
+            return self.send_json(job.as_dict())
+        if path.startswith("/reports/"):
+            return self.send_report(unquote(path.removeprefix("/reports/")))
+        if path == "/health":
+            return self.send_json({"status": "ok"})
+        self.send_error_json(404, "not found")
+
+    do_HEAD = do_GET
+
+    def send_report(self, company_name):
+        as_docx = company_name.endswith(".docx")
+        company_name = company_name.removesuffix(".docx")
+        entry = report_cache.load(company_name)
+        if entry is None:
+            return self.send_error_json(404, f"no report for {company_name!r}; POST /research to create one")
+
+        from research import PROMPT_VERSION
+        fresh = report_cache.is_fresh(entry, PROMPT_VERSION)
+        etag = report_etag(entry, "docx") if as_docx else report_etag(entry, "json", fresh)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(304)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", "0")
+            return self.end_headers()
+        if as_docx:
+            headers["Content-Disposition"] = f'attachment; filename="{quote(entry["company_name"])}_Report.docx"'
+            return self.send_body(report_docx(entry["report"]), DOCX_MIME, headers=headers)
+        self.send_json({
+            "company": entry["company_name"],
+            "report": entry["report"],
+            "scraped_data": entry["scraped_data"],
+            "generated_at": entry["generated_at"],
+            "prompt_version": entry["prompt_version"],
+            "fresh": fresh,
+        }, headers=headers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--max-jobs", type=int, default=MAX_JOBS, help="research jobs run in parallel")
+    parser.add_argument("--fake-llm", action="store_true", help="answer model calls from a local stub")
+    parser.add_argument("--fake-web", action="store_true", help="serve search results and company sites from local stubs")
+    parser.add_argument("--stub-port", type=int, default=8700, help="first of the three stub ports")
+    parser.add_argument("--quota-share", type=float,
+                        help="fraction of each deployment's TPM/RPM this process may use (AZURE_OPENAI_QUOTA_SHARE)")
+    args = parser.parse_args()
+
+    if args.quota_share is not None:
+        os.environ["AZURE_OPENAI_QUOTA_SHARE"] = str(args.quota_share)
+    if "AZURE_OPENAI_QUOTA_SHARE" not in os.environ:
+        print("Using the deployments' full TPM/RPM; set --quota-share if the app or prefetch job runs alongside")
+
+    if args.fake_llm or args.fake_web:
+        from loadtest import serve_stubs, stub_environment
+        config = {
+            "search_port": args.stub_port, "site_port": args.stub_port + 1, "llm_port": args.stub_port + 2,
+            "page_kb": 20, "site_latency": 50, "llm_latency": 200, "token_rate": 200, "completion_tokens": 80,
+        }
+        ready = multiprocessing.Event()
+        multiprocessing.Process(target=serve_stubs, args=(config, ready), daemon=True).start()
+        ready.wait(10)
+        stub_env = stub_environment(config)
+        if args.fake_llm:
+            os.environ.update({k: v for k, v in stub_env.items() if k != "GOOGLE_SEARCH_URL"})
+        if args.fake_web:
+            os.environ["GOOGLE_SEARCH_URL"] = stub_env["GOOGLE_SEARCH_URL"]
+
+    server = ApiServer((args.host, args.port), JobRunner(args.max_jobs))
+    print(f"Research API listening on http://{args.host}:{args.port}"
+          f"{' (fake LLM)' if args.fake_llm else ''}{' (fake web)' if args.fake_web else ''}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Fuzz and benchmark corpus for extractors.py.
+
+Checks that extract_fields finds the same values as the original
+scrape_company_website patterns on realistic page text and on random token
+soup, then times both on adversarial inputs built to trigger backtracking.
+
+    python bench_extractors.py [--fuzz 2000] [--seed 0]
+"""
+import argparse
+import random
+import re
+import sys
+import time
+
+from extractors import MAX_ADDRESS_LEN, extract_fields
+
+# The patterns scrape_company_website used before extractors.py
+LEGACY_PATTERNS = {
+    "phone_number": r'(\+?\d{1,3}[-.\s]?\(?\d{1,4}\)?[-.\s]?\d{1,4}[-.\s]?\d{1,9})',
+    "address": r'\d{1,5}\s[\w\s.,-]+,\s\w+,\s[A-Z]{2}\s\d{5}(-\d{4})?',
+    "employee_count": r'([0-9,]+)\s+(employees|staff|workers|team)',
+    "annual_revenue": r'(revenue|sales|turnover)[\s\w]{0,20}?\$?([\d,.]+)\s?(million|billion)?',
+    "sic_codes": r'SIC Code[:\s]*([\d]{4})'
+}
+
+NORMAL_PAGES = [
+    "Contact us at +1 (415) 555-0132 or visit 1 Infinite Loop, Cupertino, CA 95014. We have 12,500 employees.",
+    "Headquarters: 350 Fifth Avenue, New York, NY 10118-0110. Phone 212.736.3100. Annual revenue of $4.2 billion.",
+    "Global leader in packaging. Our team of 850 staff serves 40 countries. SIC Code: 2653. Sales grew to 310 million.",
+    "Investor relations | 2023 annual report | Turnover $1,250.5 million | 3,400 workers in 12 plants",
+    "About us Founded in 1998 our 45 team members build SAP integrations. Call 0800 123 4567. SIC Code 7372",
+    "Press release: CEO appointed. Offices: 100 Main St., Suite 200, Springfield, IL 62701 and 55 Water St, Boston, MA 02109",
+    "Cookie settings Privacy Terms © 2024 Example Corp. All rights reserved.",
+    "We are hiring! SAP FICO Consultant, ERP Analyst. Revenue: $ 980,000. 12 employees and growing.",
+]
+
+FUZZ_TOKENS = ["1", "12", "123", "12345", "2024", " ", " ", ", ", ",", ".", "-", "+", "(", ")", "$", ":", "\n",
+               "Main", "Street", "Springfield", "Boston", "CA", "IL", "ny", "62701", "-1234", "employees", "staff",
+               "team", "workers", "revenue", "sales", "turnover", "million", "billion", "SIC Code", "a", "!", "#",
+               "100 Main St", " Suite 5,", ", Springfield, IL 62701", ", Boston, MA 02109-1234", ", ny, ny 10001"]
+
+ADVERSARIAL = {
+    "address": lambda n: "1 , a, " * (n // 7),
+    "employee_count": lambda n: "1," * (n // 2),
+    "phone_number": lambda n: "+(" * (n // 2),
+    "annual_revenue": lambda n: ("revenue " + "1," * 10) * (n // 28),
+    "sic_codes": lambda n: ("SIC Code" + ": " * 20) * (n // 48),
+}
+
+
+def legacy_values(text):
+    values = {}
+    for key, pattern in LEGACY_PATTERNS.items():
+        match = re.search(pattern, text, re.I)
+        if not match:
+            continue
+        if key == "address":
+            # Streets longer than MAX_ADDRESS_LEN are deliberately not matched any more
+            if len(match.group(0)) <= MAX_ADDRESS_LEN:
+                values[key] = match.group(0)
+        elif key == "annual_revenue":
+            values[key] = f"${match.group(2).replace(',', '')} {match.group(3) or ''}".strip()
+        else:
+            values[key] = match.group(1)
+    return values
+
+
+def compare(text):
+    legacy = legacy_values(text)
+    current = extract_fields(text)
+    if "address" not in legacy:
+        current.pop("address", None)
+    return legacy, current
+
+
+def run_equivalence(fuzz_cases, seed):
+    failures = 0
+    for page in NORMAL_PAGES:
+        legacy, current = compare(page)
+        if legacy != current:
+            failures += 1
+            print(f"MISMATCH on normal page {page!r}\n  legacy:  {legacy}\n  current: {current}")
+    rng = random.Random(seed)
+    for _ in range(fuzz_cases):
+        text = "".join(rng.choice(FUZZ_TOKENS) for _ in range(rng.randint(10, 300)))
+        legacy, current = compare(text)
+        if legacy != current:
+            failures += 1
+            if failures <= 10:
+                print(f"MISMATCH on fuzz input {text!r}\n  legacy:  {legacy}\n  current: {current}")
+    print(f"Equivalence: {len(NORMAL_PAGES)} normal pages, {fuzz_cases} fuzz inputs, {failures} mismatches")
+    return failures
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def run_benchmark(legacy_sizes, sizes):
+    print(f"\n{'field':<16}{'chars':>10}{'legacy s':>12}{'all fields s':>14}")
+    for field, build in ADVERSARIAL.items():
+        pattern = re.compile(LEGACY_PATTERNS[field], re.I)
+        for n in sorted(set(legacy_sizes) | set(sizes)):
+            text = build(n)
+            legacy = f"{timed(pattern.search, text):.4f}" if n in legacy_sizes else "-"
+            current = timed(extract_fields, text)
+            print(f"{field:<16}{len(text):>10}{legacy:>12}{current:>14.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fuzz", type=int, default=2000, help="random inputs to compare")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    failures = run_equivalence(args.fuzz, args.seed)
+    run_benchmark(legacy_sizes=[2000, 4000, 8000], sizes=[100_000, 1_000_000])
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Input tokens per report for the report prompt layout (research.py).
+
+Counts tokens with tiktoken, the tokenizer of the Azure OpenAI deployments, for
+the current layout (one call per model tier) and for one call per section, and
+shows how much of each call is a static prefix long enough for Azure OpenAI's
+prompt cache (1024 tokens or more).
+
+    python bench_prompt.py
+
+tiktoken downloads its encoding files on first use; set TIKTOKEN_CACHE_DIR to a
+directory holding them to run offline.
+"""
+import argparse
+import json
+
+import tiktoken
+
+from llm_router import TIER_DEFAULTS
+from research import prompt_header, report_sections, section_fields, tier_messages, tier_sections
+
+CACHE_MIN_TOKENS = 1024
+# Chat formatting adds a few tokens per message and per reply
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+SAMPLE_DATA = {
+    "company_name": "Northwind Traders",
+    "address": "100 Market Street, Springfield, IL 62701",
+    "employee_count": "4,200 employees",
+    "annual_revenue": "revenue of $1.3 billion",
+    "leadership_changes": "Jane Doe joined Northwind as chief executive officer in March",
+    "recent_news": "Northwind opened a second distribution centre in Ohio",
+    "recent_funding": "",
+    "current_erp": "SAP",
+    "recent_sap_job_postings": "SAP S/4HANA Finance Consultant, SAP Basis Administrator",
+    "phone_number": "+1 (555) 123-4567",
+    "sic_codes": "5141",
+    "company_official_website": "https://www.northwind.example",
+    "strengths": "Not Available",
+    "weaknesses": "Not Available",
+    "opportunities": "Not Available",
+    "threats": "Not Available",
+}
+
+
+def encoding(tier):
+    try:
+        return tiktoken.encoding_for_model(TIER_DEFAULTS[tier]["deployment"])
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count(enc, text):
+    return len(enc.encode(text)) + TOKENS_PER_MESSAGE
+
+
+def per_tier_calls(company_name, scraped_data):
+    for tier in dict.fromkeys(tier for _, tier, _ in report_sections):
+        system, user = tier_messages(tier, company_name, scraped_data)
+        yield tier, system.content, user.content, len(tier_sections(tier))
+
+
+def per_section_calls(company_name, scraped_data):
+    for title, tier, body in report_sections:
+        data = {key: scraped_data.get(key) or "" for key in section_fields(body)}
+        request = f"Company: {company_name}\nSection: {title}\nData: {json.dumps(data, separators=(',', ':'))}"
+        yield tier, prompt_header + body, request, 1
+
+
+def measure(calls):
+    rows = []
+    for tier, system, user, sections in calls:
+        enc = encoding(tier)
+        prefix = count(enc, system)
+        rows.append({"tier": tier, "sections": sections, "prefix": prefix,
+                     "input": prefix + count(enc, user) + TOKENS_PER_REPLY,
+                     "cacheable": prefix >= CACHE_MIN_TOKENS})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--company", default=SAMPLE_DATA["company_name"])
+    args = parser.parse_args()
+
+    for name, calls in [("per tier", per_tier_calls(args.company, SAMPLE_DATA)),
+                        ("per section", per_section_calls(args.company, SAMPLE_DATA))]:
+        rows = measure(calls)
+        cost = sum(row["input"] * TIER_DEFAULTS[row["tier"]]["input_cost"] for row in rows) / 1000
+        print(f"{name}: {len(rows)} calls, {sum(row['input'] for row in rows)} input tokens, "
+              f"${cost:.5f} uncached input per report")
+        print(f"    {'tier':<8}{'sections':>9}{'prefix':>8}{'input':>8}  cacheable")
+        for row in rows:
+            print(f"    {row['tier']:<8}{row['sections']:>9}{row['prefix']:>8}{row['input']:>8}  "
+                  f"{'yes' if row['cacheable'] else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Per-interaction server time of the Streamlit app with a long search history.
+
+Starts `streamlit run` against a throwaway report cache seeded with N reports,
+opens a session over the app's websocket the way a browser does, researches
+every company (served from the cache, so no search or model calls are made) and
+then times sidebar interactions: switching to a previously researched company
+and clicking New Research. Each timing runs from the browser's rerun request to
+the server's script-finished message.
+
+    python bench_ui.py --reports 50 --switches 100
+
+For a before/after comparison, benchmark an older version of the app:
+
+    git show <rev>:model.py > model_before.py && python bench_ui.py --app model_before.py
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.websocket import websocket_connect
+
+import report_cache
+from research import PROMPT_VERSION, report_sections, section_fields
+
+FILLER_WORDS = ("solutions customers global innovation partners services quality delivery "
+                "sustainability platform industry markets digital value growth teams").split()
+
+
+def fake_report(company, rng):
+    """A report shaped like generate_summary output (~6 KB of markdown)."""
+    sections = []
+    for title, _, body in report_sections:
+        bullets = "\n".join(f"- **{field.replace('_', ' ').title()}:** "
+                            + " ".join(rng.choice(FILLER_WORDS) for _ in range(25)) for field in section_fields(body))
+        sections.append(f"## {title}\n{bullets}")
+    return f"# {company}\n\n" + "\n\n".join(sections)
+
+
+def seed_cache(cache_dir, count, seed):
+    rng = random.Random(seed)
+    report_cache.CACHE_DIR = cache_dir
+    companies = [f"Benchmark Company {i:03d}" for i in range(count)]
+    for company in companies:
+        report_cache.save(company, fake_report(company, rng), {}, PROMPT_VERSION)
+    return companies
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(app, port, cache_dir, stdout=subprocess.DEVNULL):
+    env = dict(os.environ, REPORT_CACHE_DIR=cache_dir, PYTHONUNBUFFERED="1")
+    # The app builds its Azure OpenAI clients at startup; nothing is called during the benchmark
+    env.setdefault("OPENAI_API_KEY", "bench")
+    env.setdefault("AZURE_OPENAI_ENDPOINT", "http://127.0.0.1:9")
+    env.setdefault("OPENAI_API_VERSION", "2024-06-01")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", app, "--server.port", str(port), "--server.headless", "true",
+         "--browser.gatherUsageStats", "false", "--server.fileWatcherType", "none"],
+        env=env, stdout=stdout, stderr=subprocess.DEVNULL, text=stdout is subprocess.PIPE)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"streamlit did not start on port {port}")
+
+
+class AppSession:
+    """Minimal browser stand-in: tracks widgets from deltas and sends rerun requests."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.widgets = {}  # element type and label -> (widget id, fragment id, element)
+        self.states = {}  # widget id -> WidgetState
+        self.rerun_at = None  # seconds into the last rerun when the script asked for another run
+        self.errors = []  # error alerts and exceptions shown during the last rerun
+
+    @classmethod
+    async def open(cls, port):
+        connection = await websocket_connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"])
+        connection.stream.set_nodelay(True)
+        return cls(connection)
+
+    async def rerun(self, trigger=None, fragment_id=""):
+        """Sends a rerun (optionally with a one-shot trigger state); returns (seconds, bytes received)."""
+        msg = BackMsg()
+        states = dict(self.states)
+        if trigger is not None:
+            states[trigger.id] = trigger
+        msg.rerun_script.widget_states.widgets.extend(states.values())
+        msg.rerun_script.fragment_id = fragment_id
+        self.rerun_at = None
+        self.errors = []
+        started = time.perf_counter()
+        await self.connection.write_message(msg.SerializeToString(), binary=True)
+        received = 0
+        while True:
+            payload = await self.connection.read_message()
+            if payload is None:
+                raise RuntimeError("app closed the websocket")
+            received += len(payload)
+            forward = ForwardMsg()
+            forward.ParseFromString(payload)
+            kind = forward.WhichOneof("type")
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                element = forward.delta.new_element
+                element_type = element.WhichOneof("type")
+                widget = getattr(element, element_type)
+                if element_type == "alert" and widget.format == widget.ERROR:
+                    self.errors.append(widget.body)
+                elif element_type == "exception" and not widget.is_warning:
+                    self.errors.append(widget.message or widget.type)
+                if getattr(widget, "id", ""):
+                    self.widgets[element_type] = (widget.id, forward.delta.fragment_id, widget)
+                    if getattr(widget, "label", ""):
+                        self.widgets[widget.label] = self.widgets[element_type]
+            elif kind == "script_finished":
+                if forward.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise RuntimeError("app failed to compile")
+                if forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    return time.perf_counter() - started, received
+                if self.rerun_at is None:
+                    self.rerun_at = time.perf_counter() - started
+
+    async def research(self, company):
+        widget_id, fragment_id, _ = self.widgets["chat_input"]
+        trigger = WidgetState(id=widget_id)
+        trigger.chat_input_value.data = company
+        return await self.rerun(trigger, fragment_id)
+
+    async def select(self, company):
+        widget_id, fragment_id, radio = self.widgets["radio"]
+        state = WidgetState(id=widget_id, int_value=list(radio.options).index(company))
+        self.states[widget_id] = state
+        return await self.rerun(fragment_id=fragment_id)
+
+    async def click(self, label):
+        widget_id, fragment_id, _ = self.widgets[label]
+        return await self.rerun(WidgetState(id=widget_id, trigger_value=True), fragment_id)
+
+
+def summarize(samples):
+    times = sorted(seconds * 1000 for seconds, _ in samples)
+    return {
+        "count": len(times),
+        "mean_ms": round(sum(times) / len(times), 1),
+        "p50_ms": round(times[len(times) // 2], 1),
+        "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))], 1),
+        "mean_kb_sent": round(sum(size for _, size in samples) / len(samples) / 1024, 1),
+    }
+
+
+async def run_benchmark(port, companies, switches, seed):
+    rng = random.Random(seed)
+    session = await AppSession.open(port)
+    results = {"first_load": [await session.rerun()]}
+    results["research_cached"] = [await session.research(company) for company in companies]
+    # One warm-up pass so every report's Word export is built once, as in normal use
+    for company in companies:
+        await session.select(company)
+    results["switch_company"] = [await session.select(rng.choice(companies)) for _ in range(switches)]
+    results["new_research"] = []
+    for _ in range(max(1, switches // 10)):
+        results["new_research"].append(await session.click("New Research"))
+        await session.select(rng.choice(companies))
+    session.connection.close()
+    return {name: summarize(samples) for name, samples in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default="model.py", help="Streamlit script to benchmark")
+    parser.add_argument("--reports", type=int, default=50, help="companies researched before timing navigation")
+    parser.add_argument("--switches", type=int, default=100, help="timed sidebar company switches")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-ui-") as cache_dir:
+        companies = seed_cache(cache_dir, args.reports, args.seed)
+        port = free_port()
+        process = start_app(args.app, port, cache_dir)
+        try:
+            results = asyncio.run(run_benchmark(port, companies, args.switches, args.seed))
+        finally:
+            process.terminate()
+            process.wait()
+
+    print(f"{args.app} with {args.reports} reports in history")
+    print(f"{'interaction':<18}{'count':>7}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'KB sent':>10}")
+    for name, stats in results.items():
+        print(f"{name:<18}{stats['count']:>7}{stats['mean_ms']:>10}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+              f"{stats['mean_kb_sent']:>10}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"app": args.app, "reports": args.reports, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
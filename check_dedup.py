@@ -0,0 +1,68 @@
+"""Checks for cross-page boilerplate removal (dedup.py).
+
+Builds small crawls where the right answer is known: site chrome (nav, mega
+menus, cookie banners) that must go, and real content that several pages share
+(homepage teasers of leadership and news, footer contact details) that must be
+kept exactly once.
+
+    python check_dedup.py
+"""
+import sys
+
+from bs4 import BeautifulSoup
+
+from dedup import dedup_pages
+
+NAV = "<nav><a>Home</a><a>About</a><a>Leadership</a><a>Investors</a><a>Careers</a></nav>"
+MEGA = ("<div class='mega'><p>Discover how our digital platform helps leaders in every industry grow.</p>"
+        "<p>Explore sustainability, innovation and quality across our global markets today.</p></div>")
+FOOTER = ("<footer><p>Call +1 (555) 123-4567. 100 Market Street, Springfield, IL 62701.</p>"
+          "<p>Cookie policy. All rights reserved.</p></footer>")
+CEO = "Jane Doe joined Acme as chief executive officer in March, succeeding John Roe after ten years."
+NEWS = "Acme opened a second plant in Ohio this spring, adding capacity for its industrial pumps."
+
+
+def page(body, nav=NAV, mega="", footer=FOOTER):
+    return BeautifulSoup(f"<html><body>{nav}{mega}<main>{body}</main>{footer}</body></html>", "html.parser")
+
+
+CASES = [
+    # (name, pages, texts that must appear exactly once, texts that must not appear)
+    ("teaser shared by two pages",
+     [page(f"<h1>Welcome to Acme.</h1><p>{CEO}</p>"), page(f"<h1>Leadership</h1><p>{CEO}</p>")],
+     [CEO, "Welcome to Acme.", "Leadership", "100 Market Street"], ["Investors", "Cookie policy"]),
+    ("teaser on two of four pages",
+     [page(f"<p>{NEWS}</p><p>{CEO}</p>"), page(f"<p>{CEO}</p><p>Our board.</p>"),
+      page(f"<p>{NEWS}</p><p>Annual report.</p>"), page("<p>Open roles in Ohio.</p>")],
+     [CEO, NEWS, "Our board.", "Annual report.", "Open roles in Ohio."], ["Careers"]),
+    ("mega menu outside nav on every page",
+     [page(f"<p>Page {i} body text.</p>", mega=MEGA) for i in range(4)],
+     ["Page 0 body text.", "Page 3 body text.", "(555) 123-4567"], ["Discover how", "Explore sustainability"]),
+    ("figures in inline markup on several pages",
+     [page("<p>Today we serve <b>1,200</b> customers in Ohio.</p>"),
+      page("<p>Today we have <b>1,200</b> employees in Ohio.</p><p>Revenue was <b>$45</b> million.</p>"),
+      page("<p>Revenue was <b>$45</b> million. <a>Read more</a></p>", footer="<footer><p>Tel 555-0100</p></footer>"),
+      page("<p>Careers.</p>", footer="<footer><p>Tel 555-0100</p></footer>")],
+     ["1,200 customers", "1,200 employees", "Revenue was $45 million. Read more", "Tel 555-0100"], []),
+    ("single page keeps its content",
+     [page(f"<h1>Leadership</h1><p>{CEO}</p>", mega=MEGA)],
+     [CEO, "Discover how", "Investors", "100 Market Street"], ["Cookie policy"]),
+]
+
+
+def main():
+    failures = 0
+    for name, soups, keep_once, drop in CASES:
+        text, stats = dedup_pages(soups)
+        problems = [f"expected once: {t!r} (found {text.count(t)})" for t in keep_once if text.count(t) != 1]
+        problems += [f"expected removed: {t!r}" for t in drop if t in text]
+        status = "FAIL" if problems else "ok"
+        print(f"[{status}] {name}: kept {stats['input_bytes'] - stats['removed_bytes']} of {stats['input_bytes']} bytes")
+        for problem in problems:
+            print(f"    {problem}\n    text: {text!r}")
+        failures += bool(problems)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import hashlib
+import re
+import numpy as np
+
+# -------------------------
+# Removes repeated navigation, cookie-banner and footer text from scraped pages
+# before extraction. A text block is the inline text of one block-level element
+# (a paragraph, list item, heading, cell, ...). Blocks are fingerprinted (exactly,
+# and by simhash for near-duplicates); repeats of blocks of SIMHASH_MIN_WORDS or
+# more words keep only their first copy, so short fragments such as a figure or a
+# heading are never dropped just for recurring. Site chrome is dropped outright:
+# blocks found on most pages of a crawl, and repeated blocks that sit inside
+# nav/header/footer elements, unless they contain figures the extractors need
+# (phone numbers, addresses, revenue), in which case one copy is kept. Short blocks
+# matching known boilerplate phrases are dropped as well.
+SIMHASH_MIN_WORDS = 8
+SIMHASH_MAX_DISTANCE = 3
+SIMHASH_BANDS = 4  # 4 x 16-bit bands: a distance <= 3 always leaves one band identical
+CHARS_PER_TOKEN = 4
+
+BOILERPLATE = re.compile(
+    r"cookie|all rights reserved|privacy (policy|statement|notice)|terms (of|and) (use|service|conditions)"
+    r"|skip to (main )?content|enable javascript|subscribe to our newsletter|accept all|follow us on", re.I)
+BOILERPLATE_MAX_LEN = 300
+FIGURES = re.compile(r"\d{3}")
+# Blocks on more than this share of pages are site-wide; needs at least SITE_WIDE_MIN_PAGES pages
+SITE_WIDE_SHARE = 0.5
+SITE_WIDE_MIN_PAGES = 3
+CHROME_TAGS = ["nav", "header", "footer"]
+BLOCK_TAGS = ["address", "article", "aside", "blockquote", "body", "caption", "dd", "div", "dl", "dt", "figcaption",
+              "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "li", "main", "nav", "ol", "p", "pre",
+              "section", "table", "td", "th", "tr", "ul"]
+CHROME_ROLES = ["navigation", "banner", "contentinfo"]
+
+
+def _normalize(block):
+    return " ".join(block.lower().split())
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(words):
+    """64-bit simhash over 3-word shingles."""
+    hashes = np.array([_hash64(" ".join(words[i:i + 3])) for i in range(max(1, len(words) - 2))], dtype=np.uint64)
+    bits = np.unpackbits(hashes.view(np.uint8)).reshape(len(hashes), 64)
+    return int.from_bytes(np.packbits(bits.sum(axis=0) * 2 > len(hashes)).tobytes(), "big")
+
+
+class BlockClusters:
+    """Assigns each text block a cluster id shared by exact and near-duplicate blocks."""
+
+    def __init__(self):
+        self.exact = {}
+        self.fingerprints = []  # (fingerprint, cluster id)
+        self.bands = [{} for _ in range(SIMHASH_BANDS)]
+        self.count = 0
+
+    def _band_keys(self, fingerprint):
+        width = 64 // SIMHASH_BANDS
+        return [(fingerprint >> (i * width)) & ((1 << width) - 1) for i in range(SIMHASH_BANDS)]
+
+    def cluster_id(self, block):
+        normalized = _normalize(block)
+        key = _hash64(normalized)
+        if key in self.exact:
+            return self.exact[key]
+
+        cluster = None
+        words = normalized.split()
+        if len(words) >= SIMHASH_MIN_WORDS:
+            fingerprint = simhash(words)
+            keys = self._band_keys(fingerprint)
+            for band, band_key in zip(self.bands, keys):
+                for index in band.get(band_key, ()):
+                    other, other_cluster = self.fingerprints[index]
+                    if bin(fingerprint ^ other).count("1") <= SIMHASH_MAX_DISTANCE:
+                        cluster = other_cluster
+                        break
+                if cluster is not None:
+                    break
+        if cluster is None:
+            cluster = self.count
+            self.count += 1
+        if len(words) >= SIMHASH_MIN_WORDS:
+            index = len(self.fingerprints)
+            self.fingerprints.append((fingerprint, cluster))
+            for band, band_key in zip(self.bands, keys):
+                band.setdefault(band_key, []).append(index)
+        self.exact[key] = cluster
+        return cluster
+
+
+def is_boilerplate(block):
+    return len(block) <= BOILERPLATE_MAX_LEN and BOILERPLATE.search(block) and not FIGURES.search(block)
+
+
+def _is_chrome_element(tag):
+    return tag.name in CHROME_TAGS or tag.get("role") in CHROME_ROLES
+
+
+def page_blocks(soup):
+    """(block, in_chrome) for each run of text sharing its nearest block-level element, in document order."""
+    parts, owner, in_chrome = [], None, False
+    for string in soup.descendants:
+        if type(string) not in soup.interesting_string_types:
+            continue
+        text = string.strip()
+        if not text:
+            continue
+        parent = string.find_parent(BLOCK_TAGS)
+        if parts and parent is not owner:
+            yield " ".join(parts), in_chrome
+            parts = []
+        if not parts:
+            owner, in_chrome = parent, string.find_parent(_is_chrome_element) is not None
+        parts.append(text)
+    if parts:
+        yield " ".join(parts), in_chrome
+
+
+def dedup_pages(soups):
+    """Text of all pages with repeated and boilerplate blocks removed, plus removal stats."""
+    clusters = BlockClusters()
+    pages = []
+    cluster_pages = {}
+    for page_index, soup in enumerate(soups):
+        blocks = []
+        for block, in_chrome in page_blocks(soup):
+            cluster = clusters.cluster_id(block)
+            cluster_pages.setdefault(cluster, set()).add(page_index)
+            blocks.append((block, cluster, in_chrome))
+        pages.append(blocks)
+
+    def is_site_chrome(cluster, in_chrome):
+        on_pages = len(cluster_pages[cluster])
+        if on_pages < 2:
+            return False
+        return in_chrome or (len(soups) >= SITE_WIDE_MIN_PAGES and on_pages > SITE_WIDE_SHARE * len(soups))
+
+    kept = []
+    emitted = set()
+    total_bytes = removed_bytes = removed_blocks = 0
+    for blocks in pages:
+        for block, cluster, in_chrome in blocks:
+            size = len(block.encode("utf-8"))
+            total_bytes += size
+            # Long repeats keep their first copy; site chrome keeps one only if it carries figures
+            chrome = is_site_chrome(cluster, in_chrome)
+            repeated = cluster in emitted and (chrome or len(block.split()) >= SIMHASH_MIN_WORDS)
+            if repeated or is_boilerplate(block) or (chrome and not FIGURES.search(block)):
+                removed_bytes += size
+                removed_blocks += 1
+            else:
+                kept.append(block)
+                emitted.add(cluster)
+    stats = {
+        "pages": len(soups),
+        "input_bytes": total_bytes,
+        "removed_bytes": removed_bytes,
+        "removed_blocks": removed_blocks,
+        "removed_tokens": removed_bytes // CHARS_PER_TOKEN,
+    }
+    return " ".join(kept), stats
@@ -0,0 +1,78 @@
+import bisect
+import os
+import re
+import time
+
+# -------------------------
+# Field extractors for scraped page text. Every pattern here runs in time linear in
+# the text length: quantifiers that could backtrack across long runs are possessive
+# and only tried at run boundaries, and the address pattern is located from its
+# fixed ", City, ST 12345" tail instead of being searched from every digit.
+# See bench_extractors.py for the adversarial corpus and equivalence checks.
+FIELD_TIME_BUDGET = float(os.getenv("EXTRACTION_FIELD_BUDGET", "0.05"))
+MAX_ADDRESS_LEN = 200
+
+# Every group has a fixed upper bound, so each start position costs O(1)
+PHONE = re.compile(r'(\+?\d{1,3}[-.\s]?\(?\d{1,4}\)?[-.\s]?\d{1,4}[-.\s]?\d{1,9})', re.I)
+# Only tried where a digit run starts, and the run is never given back
+EMPLOYEES = re.compile(r'(?<![0-9,])([0-9,]++)\s++(employees|staff|workers|team)', re.I)
+REVENUE = re.compile(r'(revenue|sales|turnover)[\s\w]{0,20}?\$?([\d,.]++)\s?(million|billion)?', re.I)
+SIC_CODE = re.compile(r'SIC Code[:\s]*+(\d{4})', re.I)
+
+# Address: "<1-5 digits> <street>, <City>, <ST> <ZIP>"
+ADDRESS_TAIL = re.compile(r',\s\w+,\s[A-Z]{2}\s\d{5}(?:-\d{4})?', re.I)
+ADDRESS_HEAD = re.compile(r'\d{1,5}\s')
+ADDRESS_BARRIER = re.compile(r'[^\w\s.,-]')
+
+
+def find_address(text, budget=FIELD_TIME_BUDGET):
+    """Leftmost "street, city, state zip" span, or None. Streets are capped at MAX_ADDRESS_LEN."""
+    deadline = time.perf_counter() + budget
+    barriers = [m.start() for m in ADDRESS_BARRIER.finditer(text)]
+    tails = list(ADDRESS_TAIL.finditer(text))
+    for i, tail in enumerate(tails):
+        if i % 64 == 0 and time.perf_counter() > deadline:
+            print("Address extraction exceeded its time budget")
+            return None
+        # The street must be made only of [\w\s.,-] characters, so it starts after the last barrier
+        barrier = bisect.bisect_left(barriers, tail.start())
+        run_start = max(barriers[barrier - 1] + 1 if barrier else 0, tail.start() - MAX_ADDRESS_LEN)
+        head = ADDRESS_HEAD.search(text, run_start, tail.start() - 1)
+        if not head:
+            continue
+        # Greedy like the street pattern: extend to the last tail still inside the same run
+        run_end = barriers[barrier] if barrier < len(barriers) else len(text)
+        end = tail.end()
+        for later in tails[i + 1:]:
+            if later.end() > run_end or later.end() - head.start() > MAX_ADDRESS_LEN:
+                break
+            end = later.end()
+        return text[head.start():end]
+    return None
+
+
+def extract_fields(text):
+    """Phone, address, employee count, revenue and SIC code found in `text`; missing fields are omitted."""
+    fields = {}
+
+    match = PHONE.search(text)
+    if match:
+        fields["phone_number"] = match.group(1)
+
+    address = find_address(text)
+    if address:
+        fields["address"] = address
+
+    match = EMPLOYEES.search(text)
+    if match:
+        fields["employee_count"] = match.group(1)
+
+    match = REVENUE.search(text)
+    if match:
+        fields["annual_revenue"] = f"${match.group(2).replace(',', '')} {match.group(3) or ''}".strip()
+
+    match = SIC_CODE.search(text)
+    if match:
+        fields["sic_codes"] = match.group(1)
+
+    return fields
@@ -0,0 +1,226 @@
+import os
+import threading
+import time
+from collections import deque
+import openai
+from langchain_openai import AzureChatOpenAI
+from llm_scheduler import INTERACTIVE, QueueTimeout, QuotaScheduler, estimate_tokens, retry_after_seconds
+
+# -------------------------
+# Tier defaults; every value can be overridden with AZURE_OPENAI_<TIER>_<SETTING>,
+# e.g. AZURE_OPENAI_FAST_DEPLOYMENT or AZURE_OPENAI_STRONG_TIMEOUT.
+# Costs are USD per 1K tokens; cached input tokens are billed at CACHED_INPUT_COST.
+# TPM/RPM should match the deployment's quota in Azure. Each process (the app, the
+# API, the prefetch job) schedules against its own copy of the quota, so processes
+# sharing a deployment must each take a slice of it via AZURE_OPENAI_QUOTA_SHARE.
+TIER_DEFAULTS = {
+    "fast": {"deployment": "gpt-4o-mini", "timeout": 20, "input_cost": 0.00015, "cached_input_cost": 0.000075,
+             "output_cost": 0.0006, "tpm": 100000, "rpm": 600},
+    "strong": {"deployment": "gpt-4o", "timeout": 60, "input_cost": 0.0025, "cached_input_cost": 0.00125,
+               "output_cost": 0.01, "tpm": 30000, "rpm": 180},
+}
+FALLBACK_TIER = {"fast": "strong", "strong": "fast"}
+LATENCY_WINDOW = 500
+
+
+def quota_share():
+    """Fraction (0-1] of each deployment's TPM/RPM this process may use."""
+    share = float(os.getenv("AZURE_OPENAI_QUOTA_SHARE", "1"))
+    if not 0 < share <= 1:
+        raise ValueError(f"AZURE_OPENAI_QUOTA_SHARE must be in (0, 1], got {share}")
+    return share
+
+
+def tier_config(tier):
+    """Reads the deployment, timeout, token prices and this process's quota for a tier from the environment."""
+    prefix = f"AZURE_OPENAI_{tier.upper()}_"
+    defaults = TIER_DEFAULTS[tier]
+    share = quota_share()
+    return {
+        "deployment": os.getenv(prefix + "DEPLOYMENT", defaults["deployment"]),
+        "timeout": float(os.getenv(prefix + "TIMEOUT", defaults["timeout"])),
+        "input_cost": float(os.getenv(prefix + "INPUT_COST", defaults["input_cost"])),
+        "cached_input_cost": float(os.getenv(prefix + "CACHED_INPUT_COST", defaults["cached_input_cost"])),
+        "output_cost": float(os.getenv(prefix + "OUTPUT_COST", defaults["output_cost"])),
+        "tpm": max(1, int(int(os.getenv(prefix + "TPM", defaults["tpm"])) * share)),
+        "rpm": max(1, int(int(os.getenv(prefix + "RPM", defaults["rpm"])) * share)),
+    }
+
+
+def _warm_response_models():
+    # openai builds its pydantic response models lazily, and concurrent first use can yield
+    # an empty ChatCompletion (KeyError: 'choices'). Build them once before any parallel call.
+    # construct_type is private to openai, so a failure here only costs the warm-up.
+    try:
+        from openai._models import construct_type
+        from openai.types.chat import ChatCompletion
+        construct_type(type_=ChatCompletion, value={
+            "id": "warmup", "object": "chat.completion", "created": 0, "model": "warmup",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": ""}}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0,
+                      "prompt_tokens_details": {"cached_tokens": 0}},
+        }).model_dump()
+    except Exception as e:
+        print(f"Could not warm openai response models: {e}")
+
+
+def _retryable(error):
+    """Connection errors, timeouts and 408/409/5xx responses; 429s are left to the quota scheduler."""
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    return isinstance(error, openai.APIStatusError) and (error.status_code in (408, 409) or error.status_code >= 500)
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class TierStats:
+    """Running call, latency and token counters for one tier."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.fallbacks = 0
+        self.input_tokens = 0
+        self.cached_tokens = 0
+        self.output_tokens = 0
+        self.cost = 0.0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "fallbacks_served": self.fallbacks,
+            "p50_latency_s": round(_percentile(self.latencies, 50), 2),
+            "p95_latency_s": round(_percentile(self.latencies, 95), 2),
+            "input_tokens": self.input_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cache_hit_rate": round(self.cached_tokens / self.input_tokens, 3) if self.input_tokens else 0.0,
+            "output_tokens": self.output_tokens,
+            "cost_usd": round(self.cost, 4),
+        }
+
+
+class LLMRouter:
+    """Sends each task to its configured tier and falls back to the other tier on failure."""
+
+    def __init__(self, tiers, temperature=0.7):
+        _warm_response_models()
+        self.tiers = tiers
+        self.clients = {
+            name: AzureChatOpenAI(
+                deployment_name=cfg["deployment"],
+                model_name=cfg["deployment"],
+                temperature=temperature,
+                timeout=cfg["timeout"],
+                max_retries=0,  # retried by invoke, within the call's deadline
+            )
+            for name, cfg in tiers.items()
+        }
+        self.schedulers = {
+            name: QuotaScheduler(cfg["tpm"], cfg["rpm"], max_queue_wait=float(os.getenv("AZURE_OPENAI_QUEUE_TIMEOUT", "300")))
+            for name, cfg in tiers.items()
+        }
+        self.max_retries = int(os.getenv("AZURE_OPENAI_MAX_RETRIES", "1"))
+        self.stats = {name: TierStats() for name in tiers}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls({tier: tier_config(tier) for tier in TIER_DEFAULTS})
+
+    def invoke(self, tier, prompt, priority=INTERACTIVE, on_wait=None):
+        """Runs the prompt (a string or list of messages) on `tier`, retrying once on the fallback tier.
+
+        Calls are queued behind the tier's quota scheduler; on_wait receives the queue position while waiting.
+        Each tier's timeout is a deadline for its own attempt, shared by the retries within that tier and
+        restarted whenever the quota scheduler admits the call, so a 429 pause does not count against it.
+        The fallback gets the fallback tier's timeout, and may queue for at most that long. A QueueTimeout
+        is not retried on the other tier.
+        """
+        try:
+            return self._invoke_tier(tier, prompt, priority, on_wait)
+        except QueueTimeout:
+            raise
+        except Exception as e:
+            fallback = FALLBACK_TIER.get(tier)
+            if fallback not in self.clients:
+                raise
+            print(f"LLM tier '{tier}' failed ({e}); falling back to '{fallback}'")
+            response = self._invoke_tier(fallback, prompt, priority, on_wait, max_wait=self.tiers[fallback]["timeout"])
+            with self._lock:
+                self.stats[fallback].fallbacks += 1
+            return response
+
+    def _invoke_tier(self, tier, prompt, priority, on_wait, max_wait=None):
+        scheduler = self.schedulers[tier]
+        estimated = estimate_tokens(prompt)
+        timeout = self.tiers[tier]["timeout"]
+
+        def call():
+            deadline = time.monotonic() + timeout
+            for attempt in range(self.max_retries + 1):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"LLM tier '{tier}' exceeded its {timeout:.0f}s deadline")
+                try:
+                    return time.perf_counter(), self.clients[tier].invoke(prompt, timeout=remaining)
+                except Exception as e:
+                    if attempt == self.max_retries or not _retryable(e) or retry_after_seconds(e) is not None:
+                        raise
+
+        try:
+            start, response = scheduler.run(call, estimated, priority, on_wait, max_wait=max_wait)
+        except Exception:
+            with self._lock:
+                self.stats[tier].calls += 1
+                self.stats[tier].errors += 1
+            raise
+        elapsed = time.perf_counter() - start
+
+        usage = getattr(response, "usage_metadata", None) or {}
+        input_tokens = usage.get("input_tokens", 0)
+        cached_tokens = (usage.get("input_token_details") or {}).get("cache_read", 0)
+        output_tokens = usage.get("output_tokens", 0)
+        if input_tokens or output_tokens:
+            scheduler.settle(estimated, input_tokens + output_tokens)
+        print(f"LLM call tier={tier} latency={elapsed:.2f}s input_tokens={input_tokens} "
+              f"cached_tokens={cached_tokens} output_tokens={output_tokens}")
+        cfg = self.tiers[tier]
+        with self._lock:
+            stats = self.stats[tier]
+            stats.calls += 1
+            stats.latencies.append(elapsed)
+            stats.input_tokens += input_tokens
+            stats.cached_tokens += cached_tokens
+            stats.output_tokens += output_tokens
+            stats.cost += ((input_tokens - cached_tokens) * cfg["input_cost"] + cached_tokens * cfg["cached_input_cost"]
+                           + output_tokens * cfg["output_cost"]) / 1000
+        return response
+
+    def report(self):
+        """Latency and token cost per tier, keyed by tier name."""
+        with self._lock:
+            return {
+                name: {"deployment": self.tiers[name]["deployment"], **stats.as_dict()}
+                for name, stats in self.stats.items()
+            }
+
+
+# -------------------------
+# One router per process so usage is tracked across Streamlit sessions and reruns.
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router():
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = LLMRouter.from_env()
+        return _router
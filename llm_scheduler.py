@@ -0,0 +1,148 @@
+import heapq
+import itertools
+import threading
+import time
+
+# -------------------------
+# Process-wide admission control in front of an Azure OpenAI deployment. Requests
+# queue by priority and are released only while the deployment's tokens-per-minute
+# and requests-per-minute budgets allow; a 429 pauses the whole queue for the
+# Retry-After period instead of failing the request.
+INTERACTIVE = 0
+BATCH = 1
+
+# Azure enforces quota over short windows, so only a 10-second slice of the
+# per-minute quota may be spent in a burst.
+BURST_SECONDS = 10
+CHARS_PER_TOKEN = 4
+DEFAULT_COMPLETION_TOKENS = 600
+
+
+class QueueTimeout(Exception):
+    pass
+
+
+def estimate_tokens(prompt, completion_tokens=DEFAULT_COMPLETION_TOKENS):
+    """Rough prompt + completion token count for a string or list of messages."""
+    if isinstance(prompt, str):
+        chars = len(prompt)
+    else:
+        chars = sum(len(str(getattr(m, "content", m))) for m in prompt)
+    return chars // CHARS_PER_TOKEN + completion_tokens
+
+
+def retry_after_seconds(error):
+    """Seconds to back off for a 429 error (from Retry-After when present), or None for other errors."""
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    if status != 429:
+        return None
+    headers = getattr(response, "headers", None) or {}
+    if headers.get("retry-after-ms"):
+        return float(headers["retry-after-ms"]) / 1000
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, self.rate * BURST_SECONDS)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until `amount` (capped at the bucket size) can be taken."""
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, amount):
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, amount):
+        # Settle the difference between estimated and actual usage; may go negative
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+
+class QuotaScheduler:
+    def __init__(self, tokens_per_minute, requests_per_minute, max_queue_wait=300, max_attempts=4):
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.requests = TokenBucket(requests_per_minute)
+        self.max_queue_wait = max_queue_wait
+        self.max_attempts = max_attempts
+        self._queue = []  # heap of (priority, sequence)
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+    def run(self, fn, estimated_tokens, priority=INTERACTIVE, on_wait=None, max_wait=None):
+        """Calls fn() once quota allows, retrying after 429s. on_wait gets the queue position, then None.
+
+        max_wait overrides max_queue_wait for this call."""
+        for attempt in range(self.max_attempts):
+            self._acquire(estimated_tokens, priority, on_wait, self.max_queue_wait if max_wait is None else max_wait)
+            try:
+                return fn()
+            except Exception as e:
+                delay = retry_after_seconds(e)
+                if delay is None or attempt == self.max_attempts - 1:
+                    raise
+                delay = delay or 2 ** attempt
+                print(f"Azure OpenAI rate limited; pausing queue for {delay:.1f}s")
+                self.pause(delay)
+
+    def settle(self, estimated_tokens, actual_tokens):
+        with self._cond:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+
+    def pause(self, seconds):
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def queue_length(self):
+        with self._cond:
+            return len(self._queue)
+
+    def _acquire(self, estimated_tokens, priority, on_wait, max_wait):
+        entry = (priority, next(self._sequence))
+        deadline = time.monotonic() + max_wait
+        last_position = None
+        with self._cond:
+            heapq.heappush(self._queue, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if now > deadline:
+                        raise QueueTimeout(f"No Azure OpenAI quota within {max_wait:.0f}s")
+                    if self._queue[0] == entry:
+                        wait = max(self._paused_until - now,
+                                   self.tokens.wait_time(estimated_tokens),
+                                   self.requests.wait_time(1))
+                        if wait <= 0:
+                            self.tokens.take(estimated_tokens)
+                            self.requests.take(1)
+                            return
+                    else:
+                        wait = 1.0
+                    position = sorted(self._queue).index(entry) + 1
+                    if on_wait and position != last_position:
+                        on_wait(position)
+                        last_position = position
+                    self._cond.wait(min(wait, deadline - now, 1.0))
+            finally:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+                if on_wait and last_position is not None:
+                    on_wait(None)
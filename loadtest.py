@@ -0,0 +1,375 @@
+"""Concurrent-user load test for the Streamlit app.
+
+Starts `streamlit run model.py` pointed at local stand-ins for the Google
+results page, company websites and the Azure OpenAI chat endpoint, then opens N
+browser-like sessions over the app's websocket. Each session researches random
+companies through the chat input, exactly as a user would, while concurrency
+ramps up. Reports throughput, latency percentiles and error rates per stage,
+plus the app server's CPU and memory at each level. Search, scrape, summary and
+model-call timings come from the lines the app prints for each stage; page
+load, research, render and session times are measured by the sessions.
+
+    python loadtest.py --ramp 1,4,8,16 --duration 60 --site-latency 200 --token-rate 40
+
+The stubs run in a separate process and the sessions in this one, so neither is
+counted against the app. Every research runs the full pipeline: the app gets an
+empty report cache whose entries are never fresh.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import re
+import subprocess
+import tempfile
+import threading
+import time
+import zlib
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SITE_PATHS = ["/", "/about/leadership", "/investors/annual-report", "/careers", "/news/press-releases"]
+FILLER_WORDS = ("solutions customers global innovation partners services quality delivery "
+                "sustainability platform industry markets digital value growth teams").split()
+
+
+# -------------------------
+# Stub servers
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, body, content_type="text/html; charset=utf-8", status=200):
+        body = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def company_host(company, config):
+    # Each company gets its own loopback address so per-domain caching behaves as it would live
+    suffix = company.rsplit(" ", 1)[-1]
+    index = int(suffix) if suffix.isdigit() else zlib.crc32(company.lower().encode("utf-8")) % 60000
+    return f"127.0.{index // 250}.{index % 250 + 1}:{config['site_port']}"
+
+
+class SearchHandler(StubHandler):
+    config = None
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+        company = query.removesuffix(" official site")
+        host = company_host(company, self.config)
+        self.send_body(f'<html><body><div class="g"><div class="tF2Cxc"><a href="http://{host}/">{company}</a>'
+                       f'</div></div></body></html>')
+
+
+class SiteHandler(StubHandler):
+    config = None
+
+    def do_GET(self):
+        time.sleep(self.config["site_latency"] / 1000)
+        path = urlparse(self.path).path
+        host = self.headers.get("Host")
+        if path == "/robots.txt":
+            self.send_body(f"User-agent: *\nDisallow: /private\nSitemap: http://{host}/sitemap.xml\n", "text/plain")
+        elif path == "/sitemap.xml":
+            urls = "".join(f"<url><loc>http://{host}{p}</loc></url>" for p in SITE_PATHS)
+            self.send_body(f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                           f'{urls}</urlset>', "application/xml")
+        elif path in SITE_PATHS:
+            self.send_body(company_page(host, path, self.config["page_kb"]))
+        else:
+            self.send_body("Not found", status=404)
+
+
+def company_page(host, path, page_kb):
+    rng = random.Random(host + path)
+    facts = (f"<p>Call us at +1 (555) {rng.randint(100, 999)}-{rng.randint(1000, 9999)}.</p>"
+             f"<p>Visit us at {rng.randint(1, 9999)} Market Street, Springfield, IL 62701.</p>"
+             f"<p>We have {rng.randint(50, 90000):,} employees worldwide.</p>"
+             f"<p>Annual revenue reached ${rng.randint(1, 900)} million last year.</p>"
+             f"<p>The board appointed a new CEO in March. Read the latest news and press release.</p>"
+             f"<p>Our strengths include service; a weakness is scale; opportunities abound; threats remain.</p>"
+             f"<p>We run SAP S/4HANA. <a href='/careers'>SAP Basis Consultant</a> <a href='/careers'>ERP Analyst</a></p>")
+    nav = "<nav>" + " ".join(f"<a href='{p}'>{p.strip('/') or 'home'}</a>" for p in SITE_PATHS) + "</nav>"
+    filler = []
+    size = 0
+    while size < page_kb * 1024:
+        sentence = " ".join(rng.choice(FILLER_WORDS) for _ in range(12)).capitalize() + "."
+        filler.append(f"<p>{sentence}</p>")
+        size += len(sentence) + 7
+    return f"<html><body>{nav}{facts}{''.join(filler)}<footer>Cookie policy. All rights reserved.</footer></body></html>"
+
+
+class ChatHandler(StubHandler):
+    """OpenAI-compatible /chat/completions that emits tokens at a fixed rate.
+
+    Like Azure OpenAI, a repeated system message of 1024+ tokens is reported as
+    cached in 128-token increments.
+    """
+    config = None
+    seen_prefixes = set()
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        messages = payload.get("messages", [])
+        prompt = " ".join(str(m.get("content", "")) for m in messages)
+        completion_tokens = self.config["completion_tokens"]
+        time.sleep(self.config["llm_latency"] / 1000 + completion_tokens / self.config["token_rate"])
+        prompt_tokens = len(prompt) // 4
+        prefix = messages[0].get("content", "") if messages and messages[0].get("role") == "system" else ""
+        cached_tokens = 0
+        if len(prefix) // 4 >= 1024:
+            if prefix in self.seen_prefixes:
+                cached_tokens = len(prefix) // 4 // 128 * 128
+            self.seen_prefixes.add(prefix)
+        deployment = self.path.split("/deployments/", 1)[-1].split("/", 1)[0]
+        self.send_body(json.dumps({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": deployment,
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": " ".join(["lorem"] * completion_tokens)}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens,
+                      "prompt_tokens_details": {"cached_tokens": cached_tokens}},
+        }), "application/json")
+
+
+def serve_stubs(config, ready=None):
+    """Starts the search, site and chat stubs and blocks forever."""
+    servers = []
+    for handler, port in [(SearchHandler, config["search_port"]), (SiteHandler, config["site_port"]),
+                          (ChatHandler, config["llm_port"])]:
+        handler.config = config
+        server = QuietServer(("", port), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    if ready is not None:
+        ready.set()
+    threading.Event().wait()
+
+
+def stub_environment(config):
+    """Environment that points the app at the stubs; must be applied before importing research."""
+    return {
+        "GOOGLE_SEARCH_URL": f"http://127.0.0.1:{config['search_port']}/search",
+        "AZURE_OPENAI_ENDPOINT": f"http://127.0.0.1:{config['llm_port']}",
+        "OPENAI_API_KEY": "stub",
+        "OPENAI_API_VERSION": "2024-06-01",
+        # Quota far above what the stub can serve, so the app's quota queue measures nothing but the app
+        **{f"AZURE_OPENAI_{tier}_{limit}": "100000000" for tier in ("FAST", "STRONG") for limit in ("TPM", "RPM")},
+    }
+
+
+# -------------------------
+# Measurement
+
+def process_usage(pid):
+    """CPU seconds and resident memory in bytes of a process, read from /proc (Linux)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/status") as f:
+            rss = next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+    except (OSError, StopIteration):
+        return 0.0, 0
+    # utime and stime are fields 14 and 15 of stat, in clock ticks
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK"), rss
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+# Lines the app prints: research.log_stage per pipeline stage, and the router's per-call log
+STAGE_LINE = re.compile(r"Research stage=(\w+) seconds=([\d.]+) ok=(\d)")
+LLM_LINE = re.compile(r"LLM call tier=(\w+) latency=([\d.]+)s")
+
+
+class ServerLog:
+    """Collects per-stage timings from the app's output while the load test runs."""
+
+    def __init__(self, stream):
+        self.lock = threading.Lock()
+        self.entries = []  # (stage, seconds, ok)
+        threading.Thread(target=self._read, args=(stream,), daemon=True).start()
+
+    def _read(self, stream):
+        # Prints from concurrent threads can share a line, so look for every match on it
+        for line in stream:
+            entries = [(m[1], float(m[2]), m[3] == "1") for m in STAGE_LINE.finditer(line)]
+            entries += [(f"llm_{m[1]}", float(m[2]), True) for m in LLM_LINE.finditer(line)]
+            with self.lock:
+                self.entries.extend(entries)
+
+    def mark(self):
+        with self.lock:
+            return len(self.entries)
+
+    def since(self, mark):
+        with self.lock:
+            return self.entries[mark:]
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.sessions = 0
+
+    def record(self, stage, elapsed, ok=True):
+        with self.lock:
+            self.timings[stage].append(elapsed)
+            if not ok:
+                self.errors[stage] += 1
+
+
+async def run_level(port, app_pid, server_log, concurrency, duration, companies):
+    # Imported here: bench_ui imports research, which reads its configuration on import
+    from bench_ui import AppSession
+
+    recorder = Recorder()
+    deadline = time.time() + duration
+
+    async def researcher():
+        session = None
+        try:
+            session = await AppSession.open(port)
+            elapsed, _ = await session.rerun()
+            recorder.record("load", elapsed)
+            while time.time() < deadline:
+                elapsed, _ = await session.research(random.choice(companies))
+                # The research run ends by asking for a rerun, which draws the report and builds its Word export
+                research_time = session.rerun_at if session.rerun_at is not None else elapsed
+                recorder.record("research", research_time, ok=not session.errors)
+                recorder.record("render", elapsed - research_time)
+                recorder.record("session", elapsed, ok=not session.errors)
+                recorder.sessions += 1
+        except Exception as e:
+            print(f"Session failed: {e!r}{' after ' + '; '.join(session.errors) if session and session.errors else ''}")
+            recorder.record("session", 0.0, ok=False)
+        finally:
+            if session is not None:
+                session.connection.close()
+
+    peak_rss = [process_usage(app_pid)[1]]
+    stop = asyncio.Event()
+
+    async def sample_memory():
+        while not stop.is_set():
+            peak_rss[0] = max(peak_rss[0], process_usage(app_pid)[1])
+            await asyncio.sleep(0.5)
+
+    monitor = asyncio.create_task(sample_memory())
+    log_mark = server_log.mark()
+    cpu_start, wall_start = process_usage(app_pid)[0], time.perf_counter()
+    await asyncio.gather(*(researcher() for _ in range(concurrency)))
+    wall = time.perf_counter() - wall_start
+    cpu = process_usage(app_pid)[0] - cpu_start
+    stop.set()
+    await monitor
+    # Let the app flush the log lines of the last reports
+    await asyncio.sleep(0.5)
+    for stage, seconds, ok in server_log.since(log_mark):
+        recorder.record(stage, seconds, ok)
+
+    stages = {}
+    for stage, values in recorder.timings.items():
+        stages[stage] = {
+            "count": len(values),
+            "p50_s": round(percentile(values, 50), 3),
+            "p95_s": round(percentile(values, 95), 3),
+            "p99_s": round(percentile(values, 99), 3),
+            "error_rate": round(recorder.errors[stage] / len(values), 3),
+        }
+    return {
+        "concurrency": concurrency,
+        "sessions": recorder.sessions,
+        "throughput_per_min": round(recorder.sessions / wall * 60, 2),
+        "cpu_percent": round(cpu / wall * 100, 1),
+        "peak_rss_mb": round(peak_rss[0] / 1024 / 1024, 1),
+        "stages": stages,
+    }
+
+
+def print_level(result):
+    print(f"\n== concurrency {result['concurrency']}: {result['sessions']} reports, {result['throughput_per_min']}/min, "
+          f"app CPU {result['cpu_percent']}%, app peak RSS {result['peak_rss_mb']} MB")
+    print(f"{'stage':<12}{'count':>7}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}{'errors':>9}")
+    # Server-side pipeline stages first, then what the browser sees
+    for stage in ["search", "scrape", "summary", "llm_fast", "llm_strong", "load", "research", "render", "session"]:
+        s = result["stages"].get(stage)
+        if s:
+            print(f"{stage:<12}{s['count']:>7}{s['p50_s']:>9}{s['p95_s']:>9}{s['p99_s']:>9}{s['error_rate']:>9.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default="model.py", help="Streamlit script to load test")
+    parser.add_argument("--ramp", default="1,2,4,8,16", help="comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=30, help="seconds per concurrency level")
+    parser.add_argument("--companies", type=int, default=50, help="distinct companies (and site domains)")
+    parser.add_argument("--page-kb", type=int, default=100, help="approximate size of each site page")
+    parser.add_argument("--site-latency", type=float, default=100, help="site response latency in ms")
+    parser.add_argument("--llm-latency", type=float, default=300, help="chat time-to-first-token in ms")
+    parser.add_argument("--token-rate", type=float, default=50, help="chat completion tokens per second")
+    parser.add_argument("--completion-tokens", type=int, default=120, help="tokens per chat completion")
+    parser.add_argument("--base-port", type=int, default=8700, help="first of the three stub ports")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    config = {
+        "search_port": args.base_port, "site_port": args.base_port + 1, "llm_port": args.base_port + 2,
+        "page_kb": args.page_kb, "site_latency": args.site_latency, "llm_latency": args.llm_latency,
+        "token_rate": args.token_rate, "completion_tokens": args.completion_tokens,
+    }
+    ready = multiprocessing.Event()
+    stubs = multiprocessing.Process(target=serve_stubs, args=(config, ready), daemon=True)
+    stubs.start()
+    ready.wait(10)
+    os.environ.update(stub_environment(config), REPORT_CACHE_MAX_AGE_DAYS="0")
+
+    from bench_ui import free_port, start_app
+
+    companies = [f"Company {i}" for i in range(args.companies)]
+    results = []
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as cache_dir:
+        port = free_port()
+        app = start_app(args.app, port, cache_dir, stdout=subprocess.PIPE)
+        server_log = ServerLog(app.stdout)
+        try:
+            for level in [int(n) for n in args.ramp.split(",")]:
+                result = asyncio.run(run_level(port, app.pid, server_log, level, args.duration, companies))
+                print_level(result)
+                results.append(result)
+        finally:
+            app.terminate()
+            app.wait()
+            stubs.terminate()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,181 +1,27 @@
-import os
-import re
-import requests
+import time
 import streamlit as st
-from dotenv import load_dotenv
 from PIL import Image
-from bs4 import BeautifulSoup
-from langchain.prompts import PromptTemplate
-from langchain_openai import AzureChatOpenAI
 from langchain.agents import initialize_agent, Tool
 from langchain.agents.agent_types import AgentType
 from langchain_community.tools import DuckDuckGoSearchRun
 from langchain_tavily import TavilySearch
 from langchain_community.utilities import SerpAPIWrapper
 from fill_template import fill_word_template
-
-# -------------------------
-# Load environment variables
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
-OPENAI_API_VERSION = os.getenv("OPENAI_API_VERSION")
-SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
-TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
-
-# -------------------------
-def google_search(query):
-    search_url = f"https://www.google.com/search?q={query.replace(' ', '+')}"
-    headers = {"User-Agent": "Mozilla/5.0"}
-    response = requests.get(search_url, headers=headers)
-    soup = BeautifulSoup(response.text, "html.parser")
-    for g in soup.find_all('div', class_='tF2Cxc'):
-        link = g.find('a')['href']
-        return link
-    return None
-
-# -------------------------
-def scrape_company_website(company_name):
-    info = {k: "" for k in [
-        "company_name", "address", "employee_count", "annual_revenue", "leadership_changes",
-        "recent_news", "recent_funding", "current_erp", "recent_sap_job_postings",
-        "phone_number", "sic_codes", "company_official_website",
-        "strengths", "weaknesses", "opportunities", "threats"]}
-    info["company_name"] = company_name
-    info["company_official_website"] = google_search(f"{company_name} official site") or ""
-
-    try:
-        if info["company_official_website"]:
-            response = requests.get(info["company_official_website"], timeout=10)
-            soup = BeautifulSoup(response.text, "html.parser")
-            text = soup.get_text(separator=" ", strip=True)
-
-            patterns = {
-                "phone_number": r'(\+?\d{1,3}[-.\s]?\(?\d{1,4}\)?[-.\s]?\d{1,4}[-.\s]?\d{1,9})',
-                "address": r'\d{1,5}\s[\w\s.,-]+,\s\w+,\s[A-Z]{2}\s\d{5}(-\d{4})?',
-                "employee_count": r'([0-9,]+)\s+(employees|staff|workers|team)',
-                "annual_revenue": r'(revenue|sales|turnover)[\s\w]{0,20}?\$?([\d,.]+)\s?(million|billion)?',
-                "sic_codes": r'SIC Code[:\s]*([\d]{4})'
-            }
-
-            for key, pattern in patterns.items():
-                match = re.search(pattern, text, re.I)
-                if match:
-                    value = match.group(2).replace(',', '') if key == "annual_revenue" else match.group(1)
-                    info[key] = f"${value} {match.group(3)}".strip() if key == "annual_revenue" else value
-
-            keywords = {
-                "leadership_changes": ['ceo', 'appointed', 'joined', 'leadership'],
-                "recent_news": ['news', 'announcement', 'press release'],
-                "strengths": ['strength'],
-                "weaknesses": ['weakness'],
-                "opportunities": ['opportunit'],
-                "threats": ['threat']
-            }
-            for key, kwds in keywords.items():
-                snippets = [line.strip() for line in text.split('.') if any(k in line.lower() for k in kwds)]
-                info[key] = ' '.join(snippets[:3]) or "Not Available"
-
-            for erp in ['SAP', 'Oracle ERP', 'Microsoft Dynamics', 'NetSuite', 'Infor']:
-                if erp.lower() in text.lower():
-                    info["current_erp"] = erp
-                    break
-
-            postings = [a.get_text(strip=True) for a in soup.find_all('a')
-                        if any(k in a.get_text(strip=True).lower() for k in ['sap', 'erp'])]
-            info["recent_sap_job_postings"] = ', '.join(postings) or "No SAP job postings found"
-
-    except Exception as e:
-        print(f"Scraping error: {e}")
-    return info
-
-# -------------------------
-llm = AzureChatOpenAI(deployment_name="gpt-4o", model_name="gpt-4o", temperature=0.7)
-
-# -------------------------
-prompt_template = PromptTemplate(
-    input_variables=["company_name", "scraped_data"],
-    template="""
-You are a business intelligence assistant creating a report on **{company_name}**.
-
-Return a fact-based, **plain text** report with no markdown formatting but with proper alignment. Use no asterisks (*) or hashtags (#) in the final document.
-Use the **Tavily Search tool** to enrich any missing information & give me more descriptive answers.
-
-**Company Report**
-
-## Company Fundamentals
-- **Company Name:** {company_name}
-- **Size:** {scraped_data[employee_count]}
-- **Annual Revenue:** {scraped_data[annual_revenue]}
-- **Industry Classification:** {scraped_data[sic_codes]}
-- **Business Model:** Not Available (refer to {scraped_data[company_official_website]})
-- **Geographic Presence:** Not Available (refer to {scraped_data[company_official_website]})
-- **Ownership:** Not Available (refer to Crunchbase or Bloomberg)
-
-## Financial Health & Performance
-- **Recent Financials:** {scraped_data[annual_revenue]}
-- **Stability Indicators:** Not Available (refer to investor reports or 10-K)
-- **Capital Investments:** {scraped_data[recent_funding]}
-- **Stock Performance:** Not Available (check Google Finance or Yahoo Finance)
-
-## Products, Operations & Technology
-- **Core Offerings:** Not Available (check company website)
-- **ERP System:** {scraped_data[current_erp]}
-- **Technology Stack:** Not Available (refer to job postings or CIO LinkedIn)
-
-## Leadership & Governance
-- **Executive Team:** {scraped_data[leadership_changes]}
-- **Board of Directors:** Not Available (refer to official site or Crunchbase)
-- **Leadership Strategy:** Not Available (refer to press releases/interviews)
-
-## Strategic Initiatives & Challenges
-- **Growth Priorities:** Not Available (check investor presentations)
-- **Digital Initiatives:** {scraped_data[current_erp]}
-- **Challenges Identified:** {scraped_data[weaknesses]}, {scraped_data[threats]}
-
-## Market Context & Competitors
-- **Recent News:** {scraped_data[recent_news]}
-- **Competitive Landscape:** Not Available (use Tavily or Crunchbase)
-- **Industry Trends:** Not Available (check news and analyst reports)
-
-## SAP-Relevant Signals
-- **Recent SAP Job Postings:** {scraped_data[recent_sap_job_postings]}
-- **Integration Maturity:** Not Available (check LinkedIn/job roles)
-- **Tech Budget Indicators:** Not Available (refer to earnings calls)
-
-## SWOT Analysis
-- **Strengths:** {scraped_data[strengths]}
-- **Weaknesses:** {scraped_data[weaknesses]}
-- **Opportunities:** {scraped_data[opportunities]}
-- **Threats:** {scraped_data[threats]}
-
-## Contact Information
-- **Phone:** {scraped_data[phone_number]}
-- **Address:** {scraped_data[address]}
-- **Official Website:** {scraped_data[company_official_website]}
-
-## Disclaimer
-Some data may be incomplete or outdated. For the most accurate and timely information, please verify through the company's official website, investor relations, or public disclosures.
-"""
-)
-
-def generate_summary(company_name, scraped_data):
-    try:
-        prompt = prompt_template.format(company_name=company_name, scraped_data=scraped_data)
-        return llm.invoke(prompt).content.strip()
-    except Exception as e:
-        st.error(f"Summary generation error: {e}")
-        return "Summary generation failed."
+from llm_router import get_router
+import report_cache
+from research import PROMPT_VERSION, SUMMARY_FAILED, scrape_company_website, generate_summary
+from session_store import SessionReportStore, process_stats
 
 # -------------------------
 # Streamlit UI
 
 st.set_page_config(page_title="AI Sales Research", page_icon="🤖", layout="wide")
-logo = Image.open("Logo-White.png")
+
+TEMPLATE_PATH = "ModelTemplate.docx"
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
 
 # --- CSS Styling ---
-st.markdown(
-    """
+APP_CSS = """
     <style>
     .top-right {
         position: absolute;
@@ -213,14 +59,31 @@ st.markdown(
         padding: 1rem;
     }
     </style>
-    """,
-    unsafe_allow_html=True
-)
+"""
+st.markdown(APP_CSS, unsafe_allow_html=True)
+
 
-# --- Sidebar: Logo + Title + Search History ---
+# --- Cached resources: shared by every rerun and session ---
+@st.cache_resource
+def load_logo():
+    # Decode now: a lazily loaded image shared by sessions fails when first drawn by several at once
+    logo = Image.open("Logo-White.png")
+    logo.load()
+    return logo
+
+
+# Each export is ~170 KB and this cache is process-wide, outside any session's report
+# budget: keep only the reports being switched between right now.
+@st.cache_data(max_entries=16, ttl=600, show_spinner=False)
+def report_docx(report_text):
+    """Word export of a report, reused while it is being viewed."""
+    return fill_word_template(TEMPLATE_PATH, report_text).getvalue()
+
+
+# --- Sidebar: Logo + Title ---
 with st.sidebar:
-    st.image(logo, width=250)
-    st.sidebar.title("Search History")
+    st.image(load_logo(), width=250)
+    st.title("Search History")
 
 # --- Initialize session state ---
 if "search_history" not in st.session_state:
@@ -229,40 +92,10 @@ if "selected_company" not in st.session_state:
     st.session_state["selected_company"] = None
 if "clear_screen" not in st.session_state:
     st.session_state["clear_screen"] = False
-
-# --- Sidebar: Radio Button for History — only if not in clear mode ---
-selected_index = (
-    st.session_state["search_history"].index(st.session_state["selected_company"])
-    if st.session_state["selected_company"] in st.session_state["search_history"]
-    else None
-)
-selected_company = st.sidebar.radio(
-    "Click a company to reload report:",
-    st.session_state["search_history"],
-    index=selected_index if selected_index is not None and not st.session_state["clear_screen"] else 0,
-    key="company_radio"
-)
-
-# --- If user selects a company from the sidebar, override clear_screen ---
-if selected_company and selected_company != st.session_state.get("selected_company"):
-    st.session_state["selected_company"] = selected_company
-    st.session_state["clear_screen"] = False
-
-# --- New Research Button Logic ---
-if st.sidebar.button("New Research"):
-    st.session_state["clear_screen"] = False
-    st.session_state["selected_company"] = None
-    st.rerun()
-
-# --- Instruction Note for New Research ---
-st.sidebar.markdown(
-    """
-    <div style='font-size: 11px; color: white; margin-top: 10px; margin-bottom: -5px;'>
-        <i>Note: Clicking <b>New Research</b> will refresh the chat <br>history & open a new chat.<br></i>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
+if "reports" not in st.session_state:
+    st.session_state["reports"] = SessionReportStore()
+if "report_notes" not in st.session_state:
+    st.session_state["report_notes"] = {}  # company -> {"prepared": timestamp or None, "errors": [...]}
 
 # --- Page Header ---
 st.title("AI Sales Research")
@@ -283,58 +116,134 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# --- Report Viewer (Only if screen is not cleared and a company is selected)
-if not st.session_state["clear_screen"] and selected_company:
-    st.write(f"### Report for {selected_company}")
-    if selected_company in st.session_state:
-        report_text = st.session_state[selected_company]
-        st.markdown(report_text, unsafe_allow_html=True)
+# --- Report Viewer: filled by the search history fragment ---
+report_viewer = st.empty()
 
-        template_path = "ModelTemplate.docx"
-        doc_file = fill_word_template(template_path, report_text)
 
+def select_company():
+    st.session_state["selected_company"] = st.session_state["company_radio"]
+    st.session_state["clear_screen"] = False
+
+
+def new_research():
+    st.session_state["selected_company"] = None
+    st.session_state["clear_screen"] = True
+
+
+# --- Sidebar: Search History, Download and New Research ---
+# A fragment, so picking a company or starting new research reruns only this
+# function instead of the whole app; it redraws the report into report_viewer.
+@st.fragment
+def search_history(viewer):
+    history = st.session_state["search_history"]
+    selected_company = st.session_state["selected_company"]
+    # Keep the highlighted entry in step with the report being shown
+    st.session_state["company_radio"] = selected_company if selected_company in history else None
+    st.radio(
+        "Click a company to reload report:",
+        history,
+        key="company_radio",
+        on_change=select_company
+    )
+
+    report_text = st.session_state["reports"].get(selected_company) if selected_company else None
+    if report_text is not None:
         st.download_button(
             label="📄 Download",
-            data=doc_file,
+            data=report_docx(report_text),
             file_name=f"{selected_company}_Report.docx",
-            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+            mime=DOCX_MIME,
+            on_click="ignore"
         )
+
+    st.button("New Research", on_click=new_research)
+
+    # --- Instruction Note for New Research ---
+    st.markdown(
+        """
+        <div style='font-size: 11px; color: white; margin-top: 10px; margin-bottom: -5px;'>
+            <i>Note: Clicking <b>New Research</b> will refresh the chat <br>history & open a new chat.<br></i>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+
+    # --- Report Viewer (Only if screen is not cleared and a company is selected)
+    if st.session_state["clear_screen"]:
+        viewer.info("Ready for new research. Please enter a new company name below.")
+    elif selected_company:
+        notes = st.session_state["report_notes"].get(selected_company, {})
+        with viewer.container():
+            st.write(f"### Report for {selected_company}")
+            if notes.get("prepared"):
+                st.caption(f"Prepared {time.strftime('%d %b %Y %H:%M', time.localtime(notes['prepared']))}")
+            for error in notes.get("errors", []):
+                st.error(error)
+            if report_text is not None:
+                st.markdown(report_text, unsafe_allow_html=True)
+            else:
+                st.warning("⚠️ No previous report found for this company.")
     else:
-        st.warning("⚠️ No previous report found for this company.")
+        viewer.empty()
+
 
-# --- Info block if cleared
-if st.session_state["clear_screen"]:
-    st.info("Ready for new research. Please enter a new company name below.")
-    # Do not render previous report here
+with st.sidebar:
+    search_history(report_viewer)
+
+    # --- Model tier latency and token cost (process-wide) ---
+    with st.expander("Model usage"):
+        st.table([{"tier": tier, **usage} for tier, usage in get_router().report().items()])
+
+    # --- Report memory: this session and all sessions on this server ---
+    with st.expander("Memory usage"):
+        st.table([
+            {"scope": "This session", "sessions": 1, **st.session_state["reports"].stats()},
+            {"scope": "All sessions", **process_stats()},
+        ])
 
 # --- New Company Chat Input
 user_input = st.chat_input("Enter a company name (Ex. Apple)...")
 
 if user_input:
     # Reset state and store new entry
+    report_viewer.empty()
     st.session_state["clear_screen"] = False
     st.session_state["selected_company"] = user_input
 
     if user_input not in st.session_state["search_history"]:
         st.session_state["search_history"].append(user_input)
 
-    with st.spinner(f"Searching for **{user_input}**..."):
-        company_info = scrape_company_website(user_input)
+    notes = {"prepared": None, "errors": []}
+    cached = report_cache.load_fresh(user_input, PROMPT_VERSION)
+    if cached:
+        report = cached["report"]
+        notes["prepared"] = cached["generated_at"]
+    else:
+        with st.spinner(f"Searching for **{user_input}**..."):
+            company_info = scrape_company_website(user_input)
+
+        queue_status = st.empty()
+
+        def show_queue_position(position):
+            if position:
+                queue_status.info(f"⏳ Many reports are being generated right now. You are number {position} in the queue.")
+            else:
+                queue_status.empty()
 
-    with st.spinner("Generating report..."):
-        report = generate_summary(user_input, company_info)
+        def show_error(message):
+            st.error(message)
+            notes["errors"].append(message)
 
-    st.session_state[user_input] = report
+        with st.spinner("Generating report..."):
+            report = generate_summary(user_input, company_info, on_error=show_error, on_queue=show_queue_position)
+        queue_status.empty()
 
-    st.write(f"### Report for {user_input}")
-    st.markdown(report, unsafe_allow_html=True)
+        if report != SUMMARY_FAILED:
+            report_cache.save(user_input, report, company_info, PROMPT_VERSION)
 
-    template_path = "ModelTemplate.docx"
-    doc_file = fill_word_template(template_path, report)
+    st.session_state["reports"].put(user_input, report)
+    st.session_state["report_notes"][user_input] = notes
 
-    st.download_button(
-        label="📄 Download Report",
-        data=doc_file,
-        file_name=f"{user_input}_Report.docx",
-        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-    )
\ No newline at end of file
+    # Rerun so the history fragment draws the report: anything drawn here would
+    # outlive later fragment-only reruns and stay under whichever report is picked next
+    st.rerun()
@@ -0,0 +1,232 @@
+import heapq
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+import zlib
+from collections import OrderedDict
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+import requests
+
+# -------------------------
+# Finds the pages on a company site most likely to carry the report's info fields,
+# using robots.txt and sitemap.xml. Domain metadata is cached for the whole process,
+# so every user and session shares it, and each domain is loaded once even when
+# several sessions research the same company at the same time. Discovery runs on the
+# interactive scrape path, so each domain load has a total time and byte budget.
+USER_AGENT = "Mozilla/5.0"
+CACHE_TTL = int(os.getenv("DISCOVERY_CACHE_TTL", "86400"))
+CACHE_MAX_DOMAINS = int(os.getenv("DISCOVERY_CACHE_MAX_DOMAINS", "1000"))
+MAX_CRAWL_DELAY = float(os.getenv("DISCOVERY_MAX_CRAWL_DELAY", "5"))
+TIME_BUDGET = float(os.getenv("DISCOVERY_TIME_BUDGET", "8"))
+BYTE_BUDGET = int(os.getenv("DISCOVERY_BYTE_BUDGET", str(20 * 1024 * 1024)))
+REQUEST_TIMEOUT = 10
+MAX_SITEMAPS = 10
+MAX_CANDIDATES = 50
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+FIELD_KEYWORDS = {
+    "annual_revenue": ["investor", "annual-report", "financial", "results", "revenue"],
+    "employee_count": ["about", "company", "who-we-are", "facts"],
+    "leadership_changes": ["leadership", "management", "executive", "board", "team"],
+    "recent_news": ["news", "press", "media", "announcement"],
+    "recent_sap_job_postings": ["career", "jobs", "join-us", "vacanc"],
+    "address": ["contact", "location", "office"],
+}
+
+
+class DomainInfo:
+    def __init__(self, robots, crawl_delay, candidates, last_request=0.0):
+        self.robots = robots
+        self.crawl_delay = crawl_delay
+        self.candidates = candidates
+        self.fetched_at = time.time()
+        self.last_request = last_request
+        self.lock = threading.Lock()
+
+    def expired(self):
+        return time.time() - self.fetched_at > CACHE_TTL
+
+
+class Budget:
+    """Time and byte allowance shared by every request made while loading one domain."""
+
+    def __init__(self, seconds=TIME_BUDGET, max_bytes=BYTE_BUDGET):
+        self.deadline = time.monotonic() + seconds
+        self.bytes_left = max_bytes
+
+    def remaining(self):
+        return self.deadline - time.monotonic()
+
+    def exhausted(self):
+        return self.remaining() <= 0 or self.bytes_left <= 0
+
+    def timeout(self):
+        # requests applies the timeout per connect/read, so the deadline is also checked between chunks
+        return max(0.1, min(REQUEST_TIMEOUT, self.remaining()))
+
+
+_domains = OrderedDict()  # netloc -> DomainInfo, least recently used first
+_domains_lock = threading.Lock()
+_loading = {}  # netloc -> lock held while that domain is being loaded
+
+
+def score_url(url):
+    """Relevance of a URL to the info fields, based on keywords in its path."""
+    path = urlparse(url).path.lower()
+    if not path.strip("/"):
+        return 0
+    hits = sum(1 for kwds in FIELD_KEYWORDS.values() if any(k in path for k in kwds))
+    depth = path.strip("/").count("/")
+    return hits * 10 - depth if hits else 0
+
+
+def _sitemap_chunks(response, budget):
+    """Yields the decoded XML of a sitemap response chunk by chunk, inflating .xml.gz bodies on the fly."""
+    inflater = None
+    for chunk in response.iter_content(chunk_size=65536):
+        if inflater is None:
+            inflater = zlib.decompressobj(16 + zlib.MAX_WBITS) if chunk[:2] == b"\x1f\x8b" else False
+        data = inflater.decompress(chunk) if inflater else chunk
+        budget.bytes_left -= len(data)
+        if budget.exhausted():
+            print(f"Sitemap discovery budget used up; stopped reading {response.url}")
+            return
+        yield data
+
+
+def _parse_sitemap(url, domain, candidates, nested, budget):
+    """Streams one sitemap, keeping the best-scoring page URLs and collecting nested sitemaps."""
+    with requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=budget.timeout(), stream=True) as response:
+        if response.status_code != 200:
+            return
+        parser = ET.XMLPullParser(events=("start", "end"))
+        root = None
+        loc = None
+        path = []  # tags of the open elements
+        for data in _sitemap_chunks(response, budget):
+            parser.feed(data)
+            for event, elem in parser.read_events():
+                if root is None:
+                    root = elem
+                if event == "start":
+                    path.append(elem.tag)
+                    continue
+                path.pop()
+                tag = elem.tag
+                # Only <loc> directly under <url>/<sitemap>; image:loc and video:loc are not pages
+                if tag == SITEMAP_NS + "loc":
+                    if path and path[-1] in (SITEMAP_NS + "url", SITEMAP_NS + "sitemap"):
+                        loc = (elem.text or "").strip()
+                elif tag == SITEMAP_NS + "url" and loc:
+                    if urlparse(loc).netloc.lower().removeprefix("www.") == domain:
+                        score = score_url(loc)
+                        if score > 0:
+                            entry = (score, loc)
+                            if len(candidates) < MAX_CANDIDATES:
+                                heapq.heappush(candidates, entry)
+                            elif entry > candidates[0]:
+                                heapq.heapreplace(candidates, entry)
+                    loc = None
+                    root.clear()
+                elif tag == SITEMAP_NS + "sitemap" and loc:
+                    nested.append(loc)
+                    loc = None
+                    root.clear()
+
+
+def _load_domain(base_url):
+    budget = Budget()
+    robots = RobotFileParser()
+    robots.set_url(urljoin(base_url, "/robots.txt"))
+    try:
+        response = requests.get(robots.url, headers={"User-Agent": USER_AGENT}, timeout=budget.timeout())
+        robots.parse(response.text.splitlines() if response.status_code == 200 else [])
+    except Exception as e:
+        print(f"robots.txt error: {e}")
+        robots.parse([])
+
+    domain = urlparse(base_url).netloc.lower().removeprefix("www.")
+    crawl_delay = robots.crawl_delay(USER_AGENT) or 0
+    candidates = []
+    pending = list(robots.site_maps() or [urljoin(base_url, "/sitemap.xml")])
+    if crawl_delay > MAX_CRAWL_DELAY:
+        pending = []  # polite_get could not fetch the pages in time anyway
+    seen = 0
+    last_request = 0.0  # robots.txt itself is not held to the crawl-delay
+    while pending and seen < MAX_SITEMAPS and not budget.exhausted():
+        wait = last_request + crawl_delay - time.time()
+        if wait > budget.remaining():
+            break
+        if wait > 0:
+            time.sleep(wait)
+        last_request = time.time()
+        sitemap_url = pending.pop(0)
+        seen += 1
+        try:
+            _parse_sitemap(sitemap_url, domain, candidates, pending, budget)
+        except Exception as e:
+            print(f"Sitemap error ({sitemap_url}): {e}")
+
+    ranked = [url for _, url in sorted(candidates, reverse=True)]
+    return DomainInfo(robots, crawl_delay, ranked, last_request)
+
+
+def get_domain_info(url):
+    """Cached robots/sitemap metadata for the domain of `url`."""
+    parts = urlparse(url)
+    key = parts.netloc.lower()
+    with _domains_lock:
+        info = _domains.get(key)
+        if info is not None and not info.expired():
+            _domains.move_to_end(key)
+            return info
+        load_lock = _loading.setdefault(key, threading.Lock())
+    # One load per domain; concurrent callers wait for it and then read the cache
+    with load_lock:
+        with _domains_lock:
+            info = _domains.get(key)
+            if info is not None and not info.expired():
+                return info
+        info = _load_domain(f"{parts.scheme}://{parts.netloc}/")
+        with _domains_lock:
+            _domains[key] = info
+            _domains.move_to_end(key)
+            _evict_domains()
+            _loading.pop(key, None)
+    return info
+
+
+def _evict_domains():
+    for key in [k for k, info in _domains.items() if info.expired()]:
+        del _domains[key]
+    while len(_domains) > CACHE_MAX_DOMAINS:
+        _domains.popitem(last=False)
+
+
+def discover_pages(url, limit=3):
+    """Top-ranked crawlable pages on the site of `url`, excluding `url` itself."""
+    info = get_domain_info(url)
+    pages = []
+    for candidate in info.candidates:
+        if candidate.rstrip("/") == url.rstrip("/") or not info.robots.can_fetch(USER_AGENT, candidate):
+            continue
+        pages.append(candidate)
+        if len(pages) == limit:
+            break
+    return pages
+
+
+def polite_get(url, timeout=10):
+    """GET that honours the domain's crawl-delay, counting sitemap fetches; returns None if the wait
+    would exceed MAX_CRAWL_DELAY."""
+    info = get_domain_info(url)
+    with info.lock:
+        wait = info.last_request + info.crawl_delay - time.time()
+        if wait > MAX_CRAWL_DELAY:
+            return None
+        if wait > 0:
+            time.sleep(wait)
+        info.last_request = time.time()
+    return requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=timeout)
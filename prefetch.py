@@ -0,0 +1,186 @@
+"""Off-hours prefetch of account reports.
+
+Reads an account list (one company per line, # for comments), and for every
+account whose cached report is missing or stale runs scrape_company_website and
+generate_summary, storing the result in the report cache so daytime lookups in
+the app are instant.
+
+This is a separate process with its own Azure OpenAI quota scheduler, so it is
+not queued behind the app's users. If it may overlap with app usage, give it a
+slice of each deployment's quota (--quota-share, or AZURE_OPENAI_QUOTA_SHARE).
+
+    python prefetch.py accounts.txt --window 20:00-06:00 --concurrency 3 --max-tokens 2000000 --quota-share 0.15
+
+Re-running the same list resumes: accounts already refreshed are skipped. A JSON
+run report with counts, durations and failures is written to prefetch_reports/.
+"""
+import argparse
+import datetime
+import json
+import os
+import threading
+import time
+
+import report_cache
+from llm_router import get_router
+from llm_scheduler import BATCH
+from research import PROMPT_VERSION, SUMMARY_FAILED, generate_summary, scrape_company_website
+
+REPORT_DIR = "prefetch_reports"
+
+
+def read_accounts(path):
+    accounts, seen = [], set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            name = line.split("#", 1)[0].strip()
+            if name and report_cache.normalize(name) not in seen:
+                seen.add(report_cache.normalize(name))
+                accounts.append(name)
+    return accounts
+
+
+def parse_window(window):
+    """"HH:MM-HH:MM" -> (start, end) times; the window may wrap past midnight."""
+    start, end = window.split("-")
+    return (datetime.datetime.strptime(start.strip(), "%H:%M").time(),
+            datetime.datetime.strptime(end.strip(), "%H:%M").time())
+
+
+def in_window(window, now=None):
+    if window is None:
+        return True
+    start, end = window
+    now = (now or datetime.datetime.now()).time()
+    return start <= now < end if start <= end else now >= start or now < end
+
+
+def seconds_until_window(window):
+    now = datetime.datetime.now()
+    start = datetime.datetime.combine(now.date(), window[0])
+    if start <= now:
+        start += datetime.timedelta(days=1)
+    return (start - now).total_seconds()
+
+
+def tokens_spent():
+    return sum(tier["input_tokens"] + tier["output_tokens"] for tier in get_router().report().values())
+
+
+def prefetch_account(company_name):
+    """Scrapes and summarises one account; returns (status, detail)."""
+    scraped = scrape_company_website(company_name)
+    if not scraped["company_official_website"]:
+        return "failed", "official website not found"
+    errors = []
+    report = generate_summary(company_name, scraped, on_error=errors.append, priority=BATCH)
+    if report == SUMMARY_FAILED:
+        return "failed", "; ".join(errors) or SUMMARY_FAILED
+    report_cache.save(company_name, report, scraped, PROMPT_VERSION)
+    return "generated", None
+
+
+def run(accounts, concurrency, window, max_tokens, max_age_days):
+    results = {}
+    todo = []
+    for name in accounts:
+        if report_cache.load_fresh(name, PROMPT_VERSION, max_age_days):
+            results[name] = {"status": "fresh"}
+        else:
+            todo.append(name)
+    print(f"{len(accounts)} accounts: {len(results)} already fresh, {len(todo)} to prefetch")
+
+    lock = threading.Lock()
+    pending = iter(todo)
+    start_tokens = tokens_spent()
+    stop_reason = [None]
+
+    def worker():
+        while True:
+            with lock:
+                if stop_reason[0]:
+                    return
+                if not in_window(window):
+                    stop_reason[0] = "window closed"
+                    return
+                if max_tokens and tokens_spent() - start_tokens >= max_tokens:
+                    stop_reason[0] = "token cap reached"
+                    return
+                name = next(pending, None)
+                if name is None:
+                    return
+            started = time.perf_counter()
+            try:
+                status, detail = prefetch_account(name)
+            except Exception as e:
+                status, detail = "failed", str(e)
+            duration = round(time.perf_counter() - started, 2)
+            with lock:
+                results[name] = {"status": status, "duration_s": duration, **({"error": detail} if detail else {})}
+            print(f"[{status}] {name} ({duration}s){': ' + detail if detail else ''}")
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for name in todo:
+        results.setdefault(name, {"status": "not_started"})
+    return results, stop_reason[0], tokens_spent() - start_tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("accounts", help="file with one company name per line")
+    parser.add_argument("--concurrency", type=int, default=2, help="accounts researched in parallel")
+    parser.add_argument("--window", help="local time window to run in, e.g. 20:00-06:00; waits for it to open")
+    parser.add_argument("--max-tokens", type=int, default=0, help="stop starting new accounts after this many tokens")
+    parser.add_argument("--max-age-days", type=float, default=report_cache.MAX_AGE_DAYS,
+                        help="refresh cached reports older than this")
+    parser.add_argument("--report", help="run report path (default prefetch_reports/<timestamp>.json)")
+    parser.add_argument("--quota-share", type=float,
+                        help="fraction of each deployment's TPM/RPM this process may use (AZURE_OPENAI_QUOTA_SHARE)")
+    args = parser.parse_args()
+    if args.quota_share is not None:
+        os.environ["AZURE_OPENAI_QUOTA_SHARE"] = str(args.quota_share)
+
+    window = parse_window(args.window) if args.window else None
+    if not in_window(window):
+        delay = seconds_until_window(window)
+        print(f"Waiting {delay / 3600:.1f}h for the {args.window} window to open")
+        time.sleep(delay)
+
+    started_at = datetime.datetime.now()
+    wall_start = time.perf_counter()
+    accounts = read_accounts(args.accounts)
+    results, stop_reason, tokens = run(accounts, args.concurrency, window, args.max_tokens, args.max_age_days)
+
+    counts = {}
+    for result in results.values():
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    durations = [r["duration_s"] for r in results.values() if "duration_s" in r]
+    run_report = {
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "finished_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "duration_s": round(time.perf_counter() - wall_start, 1),
+        "accounts": len(accounts),
+        "counts": counts,
+        "stopped_early": stop_reason,
+        "tokens_spent": tokens,
+        "mean_account_s": round(sum(durations) / len(durations), 2) if durations else 0,
+        "max_account_s": max(durations, default=0),
+        "failures": {name: r["error"] for name, r in results.items() if r["status"] == "failed"},
+        "model_usage": get_router().report(),
+        "results": results,
+    }
+
+    path = args.report or os.path.join(REPORT_DIR, started_at.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(run_report, f, indent=2)
+    print(f"Done: {counts}, {tokens} tokens{', stopped: ' + stop_reason if stop_reason else ''}. Report: {path}")
+
+
+if __name__ == "__main__":
+    main()
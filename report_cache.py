@@ -0,0 +1,59 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+
+# -------------------------
+# Generated reports stored on disk, shared by the app, the prefetch job and every
+# session on this instance. An entry is stale once it is older than MAX_AGE_DAYS or
+# was produced with a different prompt version.
+CACHE_DIR = os.getenv("REPORT_CACHE_DIR", "report_cache")
+MAX_AGE_DAYS = float(os.getenv("REPORT_CACHE_MAX_AGE_DAYS", "7"))
+
+
+def normalize(company_name):
+    return " ".join(company_name.lower().split())
+
+
+def cache_path(company_name):
+    key = normalize(company_name)
+    slug = re.sub(r"[^a-z0-9]+", "-", key).strip("-")[:50]
+    return os.path.join(CACHE_DIR, f"{slug}-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]}.json")
+
+
+def is_fresh(entry, prompt_version, max_age_days=MAX_AGE_DAYS):
+    return (entry.get("prompt_version") == prompt_version
+            and time.time() - entry.get("generated_at", 0) <= max_age_days * 86400)
+
+
+def load(company_name):
+    """The cached entry for a company, fresh or not, or None."""
+    try:
+        with open(cache_path(company_name), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_fresh(company_name, prompt_version, max_age_days=MAX_AGE_DAYS):
+    entry = load(company_name)
+    return entry if entry and is_fresh(entry, prompt_version, max_age_days) else None
+
+
+def save(company_name, report, scraped_data, prompt_version):
+    entry = {
+        "company_name": company_name,
+        "report": report,
+        "scraped_data": scraped_data,
+        "prompt_version": prompt_version,
+        "generated_at": time.time(),
+    }
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Write then rename so readers never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(entry, f, ensure_ascii=False)
+    os.replace(tmp_path, cache_path(company_name))
+    return entry
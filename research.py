@@ -0,0 +1,256 @@
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+import requests
+from dotenv import load_dotenv
+from bs4 import BeautifulSoup
+from langchain_core.messages import HumanMessage, SystemMessage
+from dedup import dedup_pages
+from extractors import extract_fields
+from llm_router import get_router
+from llm_scheduler import INTERACTIVE
+from page_discovery import discover_pages, polite_get
+
+# -------------------------
+# Load environment variables
+load_dotenv()
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
+OPENAI_API_VERSION = os.getenv("OPENAI_API_VERSION")
+SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
+TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
+GOOGLE_SEARCH_URL = os.getenv("GOOGLE_SEARCH_URL", "https://www.google.com/search")
+DISCOVERY_MAX_PAGES = int(os.getenv("DISCOVERY_MAX_PAGES", "3"))
+
+# -------------------------
+def log_stage(stage, started, ok=True):
+    # One line per pipeline stage; loadtest.py reads these from the app's output
+    print(f"Research stage={stage} seconds={time.perf_counter() - started:.3f} ok={int(bool(ok))}")
+
+# -------------------------
+def google_search(query):
+    search_url = f"{GOOGLE_SEARCH_URL}?q={query.replace(' ', '+')}"
+    headers = {"User-Agent": "Mozilla/5.0"}
+    response = requests.get(search_url, headers=headers)
+    soup = BeautifulSoup(response.text, "html.parser")
+    for g in soup.find_all('div', class_='tF2Cxc'):
+        link = g.find('a')['href']
+        return link
+    return None
+
+# -------------------------
+def scrape_company_website(company_name):
+    info = {k: "" for k in [
+        "company_name", "address", "employee_count", "annual_revenue", "leadership_changes",
+        "recent_news", "recent_funding", "current_erp", "recent_sap_job_postings",
+        "phone_number", "sic_codes", "company_official_website",
+        "strengths", "weaknesses", "opportunities", "threats"]}
+    info["company_name"] = company_name
+    started = time.perf_counter()
+    info["company_official_website"] = google_search(f"{company_name} official site") or ""
+    log_stage("search", started, info["company_official_website"])
+
+    started = time.perf_counter()
+    scraped = False
+    try:
+        if info["company_official_website"]:
+            # Through polite_get, so the discovered pages below wait out the crawl-delay after it
+            response = polite_get(info["company_official_website"])
+            if response is None:
+                raise RuntimeError(f"crawl-delay of {info['company_official_website']} is too long to wait out")
+            soups = [BeautifulSoup(response.text, "html.parser")]
+
+            # Pull in the sitemap pages most likely to carry revenue, leadership and careers data
+            try:
+                for page_url in discover_pages(info["company_official_website"], limit=DISCOVERY_MAX_PAGES):
+                    page = polite_get(page_url)
+                    if page is not None and page.status_code == 200:
+                        soups.append(BeautifulSoup(page.text, "html.parser"))
+            except Exception as e:
+                print(f"Page discovery error: {e}")
+
+            text, dedup_stats = dedup_pages(soups)
+            print(f"Boilerplate removed from {dedup_stats['pages']} pages: {dedup_stats['removed_bytes']} of "
+                  f"{dedup_stats['input_bytes']} bytes (~{dedup_stats['removed_tokens']} tokens)")
+
+            info.update(extract_fields(text))
+
+            keywords = {
+                "leadership_changes": ['ceo', 'appointed', 'joined', 'leadership'],
+                "recent_news": ['news', 'announcement', 'press release'],
+                "strengths": ['strength'],
+                "weaknesses": ['weakness'],
+                "opportunities": ['opportunit'],
+                "threats": ['threat']
+            }
+            for key, kwds in keywords.items():
+                snippets = [line.strip() for line in text.split('.') if any(k in line.lower() for k in kwds)]
+                info[key] = ' '.join(snippets[:3]) or "Not Available"
+
+            for erp in ['SAP', 'Oracle ERP', 'Microsoft Dynamics', 'NetSuite', 'Infor']:
+                if erp.lower() in text.lower():
+                    info["current_erp"] = erp
+                    break
+
+            postings = [a.get_text(strip=True) for soup in soups for a in soup.find_all('a')
+                        if any(k in a.get_text(strip=True).lower() for k in ['sap', 'erp'])]
+            info["recent_sap_job_postings"] = ', '.join(postings) or "No SAP job postings found"
+            scraped = True
+
+    except Exception as e:
+        print(f"Scraping error: {e}")
+    log_stage("scrape", started, scraped)
+    return info
+
+# -------------------------
+# Prompt layout. The report is written with one call per model tier instead of
+# one per section ("fast" for sections that mostly restate scraped fields,
+# "strong" for analysis), so the instructions are sent twice per report rather
+# than nine times. Each tier's system message (the instructions plus that tier's
+# part of the report skeleton) is static across companies; Azure OpenAI only
+# caches prefixes of 1024+ tokens, so check with `python bench_prompt.py` before
+# relying on cache hits. The user message carries the company name and the tier's
+# scraped fields as compact JSON. Bump PROMPT_VERSION whenever the prompt changes.
+PROMPT_VERSION = 3
+
+prompt_header = """
+You are a business intelligence assistant creating a report on the company named in the request.
+
+Return a fact-based, **plain text** report with no markdown formatting but with proper alignment. Use no asterisks (*) or hashtags (#) in the final document.
+Use the **Tavily Search tool** to enrich any missing information & give me more descriptive answers.
+Write every section below, in order, keeping its heading and field labels.
+A name in square brackets, such as [employee_count], stands for the scraped data field of that name in the request.
+"""
+
+report_sections = [
+    ("Company Fundamentals", "fast", """
+## Company Fundamentals
+- **Company Name:** [company_name]
+- **Size:** [employee_count]
+- **Annual Revenue:** [annual_revenue]
+- **Industry Classification:** [sic_codes]
+- **Business Model:** Not Available (refer to [company_official_website])
+- **Geographic Presence:** Not Available (refer to [company_official_website])
+- **Ownership:** Not Available (refer to Crunchbase or Bloomberg)
+"""),
+    ("Financial Health & Performance", "fast", """
+## Financial Health & Performance
+- **Recent Financials:** [annual_revenue]
+- **Stability Indicators:** Not Available (refer to investor reports or 10-K)
+- **Capital Investments:** [recent_funding]
+- **Stock Performance:** Not Available (check Google Finance or Yahoo Finance)
+"""),
+    ("Products, Operations & Technology", "fast", """
+## Products, Operations & Technology
+- **Core Offerings:** Not Available (check company website)
+- **ERP System:** [current_erp]
+- **Technology Stack:** Not Available (refer to job postings or CIO LinkedIn)
+"""),
+    ("Leadership & Governance", "fast", """
+## Leadership & Governance
+- **Executive Team:** [leadership_changes]
+- **Board of Directors:** Not Available (refer to official site or Crunchbase)
+- **Leadership Strategy:** Not Available (refer to press releases/interviews)
+"""),
+    ("Strategic Initiatives & Challenges", "strong", """
+## Strategic Initiatives & Challenges
+- **Growth Priorities:** Not Available (check investor presentations)
+- **Digital Initiatives:** [current_erp]
+- **Challenges Identified:** [weaknesses], [threats]
+"""),
+    ("Market Context & Competitors", "strong", """
+## Market Context & Competitors
+- **Recent News:** [recent_news]
+- **Competitive Landscape:** Not Available (use Tavily or Crunchbase)
+- **Industry Trends:** Not Available (check news and analyst reports)
+"""),
+    ("SAP-Relevant Signals", "fast", """
+## SAP-Relevant Signals
+- **Recent SAP Job Postings:** [recent_sap_job_postings]
+- **Integration Maturity:** Not Available (check LinkedIn/job roles)
+- **Tech Budget Indicators:** Not Available (refer to earnings calls)
+"""),
+    ("SWOT Analysis", "strong", """
+## SWOT Analysis
+- **Strengths:** [strengths]
+- **Weaknesses:** [weaknesses]
+- **Opportunities:** [opportunities]
+- **Threats:** [threats]
+"""),
+    ("Contact Information", "fast", """
+## Contact Information
+- **Phone:** [phone_number]
+- **Address:** [address]
+- **Official Website:** [company_official_website]
+"""),
+]
+
+def section_fields(body):
+    """Scraped data fields a skeleton section refers to, in order of first use."""
+    return list(dict.fromkeys(re.findall(r"\[(\w+)\]", body)))
+
+def tier_sections(tier):
+    return [(title, body) for title, section_tier, body in report_sections if section_tier == tier]
+
+tier_prompts = {
+    tier: f"Company report prompt v{PROMPT_VERSION}\n" + prompt_header + "".join(body for _, body in tier_sections(tier))
+    for tier in dict.fromkeys(tier for _, tier, _ in report_sections)
+}
+
+report_disclaimer = """Disclaimer
+Some data may be incomplete or outdated. For the most accurate and timely information, please verify through the company's official website, investor relations, or public disclosures."""
+
+def tier_messages(tier, company_name, scraped_data):
+    fields = [field for _, body in tier_sections(tier) for field in section_fields(body)]
+    data = {key: scraped_data.get(key) or "" for key in dict.fromkeys(fields)}
+    request = f"Company: {company_name}\nData: {json.dumps(data, separators=(',', ':'), ensure_ascii=False)}"
+    return [SystemMessage(content=tier_prompts[tier]), HumanMessage(content=request)]
+
+def split_sections(text, titles):
+    """Splits a reply covering several sections at their headings, keyed by title.
+
+    If a heading is missing or out of order the whole reply is kept under the first title."""
+    starts = []
+    for title in titles:
+        match = re.search(rf"^[#*\s]*{re.escape(title)}", text, re.MULTILINE | re.IGNORECASE)
+        if match is None or (starts and match.start() < starts[-1]):
+            return {titles[0]: text.strip()}
+        starts.append(match.start())
+    return {title: text[start:end].strip() for title, start, end in zip(titles, starts, starts[1:] + [len(text)])}
+
+def generate_tier(tier, company_name, scraped_data, priority=INTERACTIVE, on_wait=None):
+    messages = tier_messages(tier, company_name, scraped_data)
+    reply = get_router().invoke(tier, messages, priority=priority, on_wait=on_wait).content
+    return split_sections(reply, [title for title, _ in tier_sections(tier)])
+
+SUMMARY_FAILED = "Summary generation failed."
+
+def generate_summary(company_name, scraped_data, on_error=print, priority=INTERACTIVE, on_queue=None):
+    """Builds the full report. While tiers wait for Azure OpenAI quota, on_queue is called
+    (from this thread) with the best queue position among them, and with None once all are running."""
+    positions = {}
+    started = time.perf_counter()
+
+    def tracker(tier):
+        return lambda position: positions.__setitem__(tier, position)
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(tier_prompts)) as pool:
+            futures = [pool.submit(generate_tier, tier, company_name, scraped_data, priority, tracker(tier))
+                       for tier in tier_prompts]
+            pending = set(futures)
+            while pending:
+                _, pending = wait(pending, timeout=0.5)
+                if on_queue:
+                    waiting = [p for p in positions.values() if p]
+                    on_queue(min(waiting) if waiting else None)
+            parts = {title: text for f in futures for title, text in f.result().items()}
+        sections = [parts[title] for title, _, _ in report_sections if title in parts]
+        log_stage("summary", started)
+        return "\n\n".join(["Company Report", *sections, report_disclaimer])
+    except Exception as e:
+        log_stage("summary", started, ok=False)
+        on_error(f"Summary generation error: {e}")
+        return SUMMARY_FAILED
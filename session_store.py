@@ -0,0 +1,102 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+import zlib
+from collections import OrderedDict
+
+# -------------------------
+# Per-session report holder with a memory budget. Reports are kept zlib-compressed;
+# when a session goes over budget the least recently viewed reports are spilled to
+# disk and read back the next time they are selected.
+BUDGET_BYTES = int(os.getenv("SESSION_REPORT_BUDGET_BYTES", str(1024 * 1024)))
+SPILL_ROOT = os.getenv("SESSION_SPILL_DIR") or None
+
+_stores = weakref.WeakSet()
+_stores_lock = threading.Lock()
+
+
+class SessionReportStore:
+    def __init__(self, budget_bytes=BUDGET_BYTES, spill_root=SPILL_ROOT):
+        self.budget_bytes = budget_bytes
+        self.spill_root = spill_root
+        self.spill_dir = None
+        self._resident = OrderedDict()  # name -> compressed body, least recently viewed first
+        self._spilled = {}  # name -> (path, compressed size)
+        self._lock = threading.Lock()
+        with _stores_lock:
+            _stores.add(self)
+
+    def __contains__(self, name):
+        return name in self._resident or name in self._spilled
+
+    def __len__(self):
+        return len(self._resident) + len(self._spilled)
+
+    def put(self, name, text):
+        with self._lock:
+            self._discard_spill(name)
+            self._resident[name] = zlib.compress(text.encode("utf-8"))
+            self._resident.move_to_end(name)
+            self._evict()
+
+    def get(self, name):
+        """Returns the report text, rehydrating it from disk if it was spilled, or None."""
+        with self._lock:
+            if name in self._resident:
+                self._resident.move_to_end(name)
+                body = self._resident[name]
+            elif name in self._spilled:
+                path, _ = self._spilled.pop(name)
+                with open(path, "rb") as f:
+                    body = f.read()
+                os.remove(path)
+                self._resident[name] = body
+                self._evict()
+            else:
+                return None
+        return zlib.decompress(body).decode("utf-8")
+
+    def _evict(self):
+        # Always keep the most recently viewed report in memory
+        while len(self._resident) > 1 and self.resident_bytes() > self.budget_bytes:
+            name, body = self._resident.popitem(last=False)
+            if self.spill_dir is None:
+                self.spill_dir = tempfile.mkdtemp(prefix="sales-research-", dir=self.spill_root)
+                weakref.finalize(self, shutil.rmtree, self.spill_dir, True)
+            path = os.path.join(self.spill_dir, hashlib.sha1(name.encode("utf-8")).hexdigest() + ".z")
+            with open(path, "wb") as f:
+                f.write(body)
+            self._spilled[name] = (path, len(body))
+
+    def _discard_spill(self, name):
+        if name in self._spilled:
+            path, _ = self._spilled.pop(name)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def resident_bytes(self):
+        return sum(len(body) for body in self._resident.values())
+
+    def stats(self):
+        with self._lock:
+            return {
+                "reports": len(self),
+                "in_memory": len(self._resident),
+                "spilled": len(self._spilled),
+                "memory_bytes": self.resident_bytes(),
+                "spilled_bytes": sum(size for _, size in self._spilled.values()),
+            }
+
+
+def process_stats():
+    """Totals across every live session store in this process."""
+    with _stores_lock:
+        stores = list(_stores)
+    totals = {"sessions": len(stores), "reports": 0, "in_memory": 0, "spilled": 0, "memory_bytes": 0, "spilled_bytes": 0}
+    for store in stores:
+        for key, value in store.stats().items():
+            totals[key] += value
+    return totals
@@ -0,0 +1,100 @@
+import http.client
+import json
+import os
+import threading
+import time
+
+import pytest
+
+import api
+import report_cache
+from research import PROMPT_VERSION
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(report_cache, "CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def server(cache_dir, monkeypatch):
+    monkeypatch.setattr(api, "API_KEY", None)
+    server = api.ApiServer(("127.0.0.1", 0), api.JobRunner(max_jobs=1))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, method, path, headers=None, body=None):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+    connection.request(method, path, body=body, headers=headers or {})
+    response = connection.getresponse()
+    payload = response.read()
+    connection.close()
+    return response, payload
+
+
+def age_entry(company_name, days):
+    path = report_cache.cache_path(company_name)
+    with open(path, encoding="utf-8") as f:
+        entry = json.load(f)
+    entry["generated_at"] -= days * 86400
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+
+
+def test_report_etag_covers_freshness_version_and_representation():
+    entry = {"generated_at": 1.0, "prompt_version": PROMPT_VERSION, "report": "text"}
+    etag = api.report_etag(entry, "json", True)
+    assert etag == api.report_etag(dict(entry), "json", True)
+    assert etag != api.report_etag(entry, "json", False)
+    assert etag != api.report_etag(dict(entry, prompt_version=PROMPT_VERSION - 1), "json", True)
+    assert etag != api.report_etag(entry, "docx")
+
+
+def test_etag_matches_lists_weak_tags_and_wildcard():
+    assert api.etag_matches('"a", W/"b"', '"b"')
+    assert api.etag_matches("*", '"b"')
+    assert not api.etag_matches('"a"', '"b"')
+    assert not api.etag_matches(None, '"b"')
+
+
+def test_report_answers_304_until_it_goes_stale(server):
+    report_cache.save("Acme", "Company Report", {}, PROMPT_VERSION)
+    response, body = request(server, "GET", "/reports/Acme")
+    assert response.status == 200
+    assert json.loads(body)["fresh"] is True
+    etag = response.getheader("ETag")
+
+    response, body = request(server, "GET", "/reports/Acme", {"If-None-Match": etag})
+    assert response.status == 304
+    assert body == b""
+    assert response.getheader("ETag") == etag
+
+    age_entry("Acme", report_cache.MAX_AGE_DAYS + 1)
+    response, body = request(server, "GET", "/reports/Acme", {"If-None-Match": etag})
+    assert response.status == 200
+    assert json.loads(body)["fresh"] is False
+    assert response.getheader("ETag") != etag
+
+
+def test_unknown_report_is_404(server):
+    response, _ = request(server, "GET", "/reports/Nobody")
+    assert response.status == 404
+
+
+@pytest.mark.parametrize("length", ["-1", "abc", "1_0"])
+def test_research_rejects_invalid_content_length(server, length):
+    response, body = request(server, "POST", "/research", {"Content-Length": length})
+    assert response.status == 400
+    assert "Content-Length" in json.loads(body)["error"]
+
+
+def test_research_returns_a_fresh_cached_report(server):
+    report_cache.save("Acme", "Company Report", {}, PROMPT_VERSION)
+    response, body = request(server, "POST", "/research", {"Content-Type": "application/json"},
+                             json.dumps({"company": "Acme"}))
+    assert response.status == 200
+    assert json.loads(body)["report"] == "/reports/Acme"
@@ -0,0 +1,92 @@
+import time
+
+import httpx
+import openai
+import pytest
+from langchain_core.messages import AIMessage
+
+from llm_router import TIER_DEFAULTS, LLMRouter
+from llm_scheduler import QueueTimeout, QuotaScheduler
+
+REQUEST = httpx.Request("POST", "http://azure.test/chat/completions")
+
+
+def server_error():
+    return openai.InternalServerError("boom", response=httpx.Response(500, request=REQUEST), body=None)
+
+
+def rate_limited(retry_after):
+    response = httpx.Response(429, headers={"retry-after": str(retry_after)}, request=REQUEST)
+    return openai.RateLimitError("slow down", response=response, body=None)
+
+
+class FakeClient:
+    """Stands in for AzureChatOpenAI: replays `outcomes` (exceptions, delays or replies) in order."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.timeouts = []
+
+    def invoke(self, prompt, timeout):
+        self.timeouts.append(timeout)
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if outcome == "hang":
+            time.sleep(timeout)
+            raise openai.APITimeoutError(request=REQUEST)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return AIMessage(content=outcome)
+
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.setenv("AZURE_OPENAI_MAX_RETRIES", "1")
+    tiers = {tier: dict(cfg, timeout=0.3 if tier == "fast" else 0.5) for tier, cfg in TIER_DEFAULTS.items()}
+    return LLMRouter(tiers)
+
+
+def test_answers_from_the_requested_tier(router):
+    router.clients = {"fast": FakeClient("fast reply"), "strong": FakeClient("strong reply")}
+    assert router.invoke("fast", "hi").content == "fast reply"
+    assert router.clients["strong"].timeouts == []
+
+
+def test_falls_back_on_error(router):
+    router.clients = {"fast": FakeClient(ValueError("bad request")), "strong": FakeClient("strong reply")}
+    assert router.invoke("fast", "hi").content == "strong reply"
+    assert len(router.clients["fast"].timeouts) == 1  # not retryable
+    assert router.report()["strong"]["fallbacks_served"] == 1
+
+
+def test_retries_server_errors_within_the_tier(router):
+    router.clients = {"fast": FakeClient(server_error(), "fast reply"), "strong": FakeClient("strong reply")}
+    assert router.invoke("fast", "hi").content == "fast reply"
+    assert len(router.clients["fast"].timeouts) == 2
+
+
+def test_falls_back_on_timeout_with_its_own_budget(router):
+    router.clients = {"fast": FakeClient("hang"), "strong": FakeClient("strong reply")}
+    started = time.monotonic()
+    assert router.invoke("fast", "hi").content == "strong reply"
+    # The fast tier's retry found its deadline spent; the fallback got the strong tier's full timeout
+    assert router.clients["fast"].timeouts == [pytest.approx(0.3, abs=0.05)]
+    assert router.clients["strong"].timeouts == [pytest.approx(0.5, abs=0.05)]
+    assert time.monotonic() - started < 1
+
+
+def test_429_pause_does_not_count_against_the_deadline(router):
+    # Retry-After is longer than the fast tier's 0.3s timeout
+    router.clients = {"fast": FakeClient(rate_limited(0.5), "fast reply"), "strong": FakeClient("strong reply")}
+    assert router.invoke("fast", "hi").content == "fast reply"
+    assert router.clients["fast"].timeouts == [pytest.approx(0.3, abs=0.05)] * 2
+    assert router.clients["strong"].timeouts == []
+
+
+def test_queue_timeout_does_not_fall_back(router):
+    router.clients = {"fast": FakeClient("fast reply"), "strong": FakeClient("strong reply")}
+    router.schedulers["fast"] = QuotaScheduler(10_000_000, 1, max_queue_wait=0.1)
+    router.schedulers["fast"].requests.level = 0
+    with pytest.raises(QueueTimeout):
+        router.invoke("fast", "hi")
+    assert router.clients["fast"].timeouts == []
+    assert router.clients["strong"].timeouts == []
@@ -0,0 +1,100 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from llm_scheduler import BATCH, INTERACTIVE, QueueTimeout, QuotaScheduler
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after):
+        super().__init__("429")
+        self.response = SimpleNamespace(status_code=429, headers={"retry-after": str(retry_after)})
+
+
+def drained(requests_per_minute=600, **kwargs):
+    scheduler = QuotaScheduler(10_000_000, requests_per_minute, **kwargs)
+    scheduler.requests.level = 0
+    return scheduler
+
+
+def test_interactive_requests_go_ahead_of_queued_batch_work():
+    scheduler = drained()  # 10 requests/s, so each admission waits ~0.1s
+    order = []
+    threads = []
+    for name, priority in [("batch-1", BATCH), ("batch-2", BATCH), ("interactive", INTERACTIVE)]:
+        thread = threading.Thread(target=scheduler.run, args=(lambda n=name: order.append(n), 100, priority))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join(5)
+    assert order[0] == "interactive"
+    assert sorted(order) == ["batch-1", "batch-2", "interactive"]
+
+
+def test_queue_position_is_reported_then_cleared():
+    scheduler = drained()
+    positions = []
+    scheduler.run(lambda: None, 100, on_wait=positions.append)
+    assert positions == [1, None]
+
+
+def test_429_pauses_the_queue_and_retries():
+    scheduler = QuotaScheduler(10_000_000, 600)
+    calls = []
+
+    def call():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise RateLimited(0.3)
+        return "ok"
+
+    assert scheduler.run(call, 100) == "ok"
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 0.3
+
+
+def test_429_is_raised_after_max_attempts():
+    scheduler = QuotaScheduler(10_000_000, 600, max_attempts=2)
+
+    def call():
+        raise RateLimited(0.05)
+
+    with pytest.raises(RateLimited):
+        scheduler.run(call, 100)
+
+
+def test_other_errors_are_not_retried():
+    scheduler = QuotaScheduler(10_000_000, 600)
+    calls = []
+
+    def call():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        scheduler.run(call, 100)
+    assert len(calls) == 1
+
+
+def test_queue_timeout_when_no_quota_arrives():
+    scheduler = drained(requests_per_minute=1, max_queue_wait=0.2)
+    called = []
+    started = time.monotonic()
+    with pytest.raises(QueueTimeout):
+        scheduler.run(lambda: called.append(1), 100)
+    assert not called
+    assert time.monotonic() - started < 2
+    assert scheduler.queue_length() == 0
+
+
+def test_max_wait_overrides_the_queue_timeout():
+    scheduler = drained(requests_per_minute=1, max_queue_wait=300)
+    started = time.monotonic()
+    with pytest.raises(QueueTimeout):
+        scheduler.run(lambda: None, 100, max_wait=0.1)
+    assert time.monotonic() - started < 2
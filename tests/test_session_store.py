@@ -0,0 +1,55 @@
+import os
+import random
+
+from session_store import SessionReportStore, process_stats
+
+
+def report(seed, size=40_000):
+    # Random text compresses poorly: each report takes over 20 KB in memory, so a 30 KB budget holds one
+    rng = random.Random(seed)
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz0123456789 ") for _ in range(size))
+
+
+def test_over_budget_reports_spill_to_disk_and_rehydrate(tmp_path):
+    store = SessionReportStore(budget_bytes=30_000, spill_root=str(tmp_path))
+    for name in ["a", "b", "c"]:
+        store.put(name, report(name))
+
+    stats = store.stats()
+    assert stats["reports"] == 3
+    assert stats["spilled"] == 2
+    assert stats["in_memory"] == 1
+    assert len(os.listdir(store.spill_dir)) == 2
+
+    assert store.get("a") == report("a")
+    assert store.stats()["spilled"] == 2  # "a" is back in memory, "c" went out in its place
+    assert "a" in store and len(store) == 3
+    assert store.get("c") == report("c")
+    assert len(os.listdir(store.spill_dir)) == 2
+
+
+def test_put_replaces_a_spilled_report(tmp_path):
+    store = SessionReportStore(budget_bytes=30_000, spill_root=str(tmp_path))
+    store.put("a", report("a"))
+    store.put("b", report("b"))
+    store.put("a", "new report")
+    assert store.get("a") == "new report"
+    assert store.get("b") == report("b")
+    assert store.stats()["spilled"] == 0
+    assert os.listdir(store.spill_dir) == []
+
+
+def test_most_recent_report_stays_in_memory_even_over_budget(tmp_path):
+    store = SessionReportStore(budget_bytes=10, spill_root=str(tmp_path))
+    store.put("a", report("a"))
+    assert store.stats()["in_memory"] == 1
+    assert store.get("missing") is None
+
+
+def test_process_stats_cover_live_stores(tmp_path):
+    before = process_stats()
+    store = SessionReportStore(spill_root=str(tmp_path))
+    store.put("a", "report")
+    after = process_stats()
+    assert after["sessions"] == before["sessions"] + 1
+    assert after["reports"] == before["reports"] + 1